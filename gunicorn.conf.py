@@ -0,0 +1,40 @@
+# Read by gunicorn from the working directory (see Procfile).
+import os
+
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# With preload_app the master imports Django, the URLconf and every lazily
+# loaded view once; workers are forked from it and start without importing
+# anything. Set GUNICORN_PRELOAD=0 to have each worker load the app itself,
+# e.g. to pick up code changes on a HUP without a full restart.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from user.lazy import import_all
+
+        import_all()
+        _close_connections()
+
+
+def pre_fork(server, worker):
+    if server.cfg.preload_app:
+        _close_connections()
+
+
+def child_exit(server, worker):
+    # Keeps an exited worker's metrics and frees its pid's file; see
+    # Registry.retire.
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "student_mgmt_project.settings")
+    from user.metrics import REGISTRY
+
+    REGISTRY.retire(worker.pid)
+
+
+def _close_connections():
+    # A socket opened in the master would be shared by every forked worker.
+    # Closing it before forking leaves each worker to open its own.
+    from django.db import connections
+
+    connections.close_all()
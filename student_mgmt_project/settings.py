@@ -28,6 +28,8 @@ SECRET_KEY = os.environ.get("SECRET_KEY")
 DEBUG = False # for deploymen
 
 ALLOWED_HOSTS = ["studentmanagement-production-3293.up.railway.app"] # for deploymen
+# Hosts of additional tenants (Tenant.domain), comma separated.
+ALLOWED_HOSTS += [h for h in os.environ.get("EXTRA_ALLOWED_HOSTS", "").split(",") if h]
 
 STATIC_ROOT = BASE_DIR / 'staticfiles' # for deployment
 
@@ -47,12 +49,23 @@ INSTALLED_APPS = [
 
 ]
 
+# Process role. Background workers (APP_ROLE=worker, e.g. run_report_jobs)
+# never serve /admin/, so they boot without django.contrib.admin; web
+# processes can drop it too with ADMIN_ENABLED=0.
+APP_ROLE = os.environ.get("APP_ROLE", "web")
+ADMIN_ENABLED = os.environ.get("ADMIN_ENABLED", "1" if APP_ROLE == "web" else "0") == "1"
+if not ADMIN_ENABLED:
+    INSTALLED_APPS.remove('django.contrib.admin')
+
 MIDDLEWARE = [
+    'user.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'user.middleware.TenantMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'user.middleware.AuditMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -69,6 +82,8 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'user.permissions.capabilities',
+                'user.idempotency.idempotency_key',
             ],
         },
     },
@@ -103,6 +118,19 @@ DATABASES = {
 
 
 
+# Cache
+# Idempotency keys, capability and analytics caches only dedupe across
+# workers with a shared backend, e.g. CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache
+# and CACHE_LOCATION=cache_table (run createcachetable).
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        'LOCATION': os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -165,3 +193,33 @@ EMAIL_HOST_PASSWORD = "bywk dfqk sjkm tfqq"
 CSRF_TRUSTED_ORIGINS = [
     "https://studentmanagement-production-3293.up.railway.app",
 ]
+
+# Metrics: set METRICS_MULTIPROC_DIR to a shared, empty directory when running
+# several gunicorn workers so /metrics reports totals across all of them.
+METRICS_MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_INTERVAL = 1.0
+# /metrics answers only requests carrying "Authorization: Bearer <token>";
+# leave it unset to turn the endpoint off.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# Live admin dashboard feed. LocalBroker only reaches clients connected to the
+# same process; use user.live.DatabaseBroker when running several workers.
+LIVE_FEED_BACKEND = os.environ.get("LIVE_FEED_BACKEND", "user.live.LocalBroker")
+
+# Tenant for hosts that match no Tenant.domain, and for rows created outside
+# a request. Created by migration 0011.
+DEFAULT_TENANT_SLUG = os.environ.get("DEFAULT_TENANT_SLUG", "default")
+
+# Uploads stream through user.uploads.LimitedUploadHandler, which drops files
+# over these limits before they are buffered; profile pictures are decoded
+# and resized by UPLOAD_WORKERS background threads per process.
+FILE_UPLOAD_HANDLERS = [
+    'user.uploads.LimitedUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+UPLOAD_MAX_BYTES = 5 * 1024 * 1024
+UPLOAD_MAX_PIXELS = 24_000_000
+UPLOAD_HEADER_BYTES = 256 * 1024
+UPLOAD_WORKERS = int(os.environ.get("UPLOAD_WORKERS", "2"))
+PROFILE_PICTURE_SIZE = 512
@@ -0,0 +1,56 @@
+"""
+Settings for the test suite.
+
+    python manage.py test --parallel
+
+manage.py switches to this module for the test command. Nothing here needs
+DATABASE_URL, a cache server or an SMTP account; each parallel worker gets its
+own in-memory database, cache and mailbox. The suite should finish in under
+TEST_TIME_BUDGET seconds; the runner prints a warning when it does not.
+"""
+
+import atexit
+import shutil
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+
+
+SECRET_KEY = "test-only-secret-key"
+
+DEBUG = False
+
+ALLOWED_HOSTS = ["testserver"]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Hashing dominates user setup with the default PBKDF2 iterations.
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+# Transcript snapshots and uploads stay out of the project's media directory.
+# Every process that imports these settings (parallel workers included)
+# makes its own directory and removes it on exit.
+MEDIA_ROOT = tempfile.mkdtemp(prefix="student-mgmt-test-media-")
+atexit.register(shutil.rmtree, MEDIA_ROOT, True)
+
+METRICS_MULTIPROC_DIR = None
+METRICS_TOKEN = "test-metrics-token"
+LIVE_FEED_BACKEND = "user.live.LocalBroker"
+# Pictures are processed inline when the transaction commits.
+UPLOAD_WORKERS = 0
+
+TEST_RUNNER = "user.tests.runner.TimedTestRunner"
+TEST_TIME_BUDGET = 30
@@ -1,45 +1,53 @@
-from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
-from django.contrib.auth import views as auth_views
-from django.contrib.auth.forms import SetPasswordForm
+from user.lazy import lazy_view
 
+# Password reset views are loaded on first use, like the app's own views
+# (user/urls.py). This does not keep auth.views or auth.forms out of boot:
+# AuthenticationMiddleware imports redirect_to_login from auth.views, which
+# imports auth.forms.
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('', include('user.urls')),
 
     # Password Reset
     path(
         'password-reset/',
-        auth_views.PasswordResetView.as_view(
-            template_name='auth/password_reset.html'
+        lazy_view(
+            'django.contrib.auth.views.PasswordResetView',
+            template_name='auth/password_reset.html',
+            # The default email template ships with django.contrib.admin,
+            # which worker roles may not install.
+            email_template_name='auth/password_reset_email.html',
         ),
         name='password_reset'
     ),
 
     path(
         'password-reset/done/',
-        auth_views.PasswordResetDoneView.as_view(
-            template_name='auth/password_reset_done.html'
+        lazy_view(
+            'django.contrib.auth.views.PasswordResetDoneView',
+            template_name='auth/password_reset_done.html',
         ),
         name='password_reset_done'
     ),
 
     path(
         'reset/<uidb64>/<token>/',
-        auth_views.PasswordResetConfirmView.as_view(
+        lazy_view(
+            'django.contrib.auth.views.PasswordResetConfirmView',
             template_name='auth/password_reset_confirm.html',
-            form_class=SetPasswordForm,       # 🔥 CRITICAL FIX
+            # form_class is SetPasswordForm, the view's default.
         ),
         name='password_reset_confirm'
     ),
 
     path(
         'password-reset-complete/',
-        auth_views.PasswordResetCompleteView.as_view(
-            template_name='auth/password_reset_complete.html'
+        lazy_view(
+            'django.contrib.auth.views.PasswordResetCompleteView',
+            template_name='auth/password_reset_complete.html',
         ),
         name='password_reset_complete'
     ),
@@ -47,5 +55,11 @@ urlpatterns = [
 
 ]
 
+# Processes started with ADMIN_ENABLED=0 (see settings) do not load the admin.
+if settings.ADMIN_ENABLED:
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
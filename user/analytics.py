@@ -0,0 +1,194 @@
+from itertools import chain
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from . import archive, audit, metrics, tenancy
+from .models import ArchivedStudent, Enrollment, Course, AuditLog, StudentProfile
+
+
+COLUMNS = (
+    'student__department',
+    'student__year_of_admission',
+    'course_id',
+    'progress',
+    'completed',
+    'enrolled_at',
+    'completed_at',
+)
+PROGRESS_BUCKETS = 10
+PERCENTILES = (50, 75, 90)
+CACHE_TIMEOUT = 60 * 60
+
+
+def data_version():
+    # Every change made through the app lands in the audit log, so its newest
+    # id moves whenever the underlying data does; maintenance commands that
+    # bypass it bump audit.bulk_version instead.
+    logs = AuditLog.objects.all()
+    tenant_id = tenancy.current_tenant_id()
+    if tenant_id is not None:
+        logs = logs.filter(tenant_id=tenant_id)
+    return f"{logs.aggregate(v=Max('id'))['v'] or 0}.{audit.bulk_version()}"
+
+
+def archived_rows():
+    # The archived enrollments that still count, in COLUMNS order. The
+    # student is a StudentProfile, or an ArchivedStudent once graduated.
+    def student(field):
+        return Coalesce(
+            Subquery(StudentProfile.objects.filter(pk=OuterRef('student_id')).values(field)),
+            Subquery(ArchivedStudent.objects.filter(pk=OuterRef('student_id')).values(field)),
+        )
+
+    return archive.counted_archive().annotate(
+        department=student('department'), year=student('year_of_admission'),
+    ).values_list('department', 'year', *COLUMNS[2:])
+
+
+def load_columns(queryset=None, chunk_size=50000):
+    # Streams rows into NumPy columns without building model objects.
+    # Departments are factorized to integer codes; returns (columns, departments).
+    # By default both tiers are read, so archiving changes no rate.
+    if queryset is None:
+        querysets = [Enrollment.objects.values_list(*COLUMNS), archived_rows()]
+    else:
+        querysets = [queryset.values_list(*COLUMNS)]
+    rows = chain.from_iterable(qs.order_by().iterator(chunk_size=chunk_size) for qs in querysets)
+
+    departments = {}
+    dtypes = {
+        'department': np.int32,
+        'year': np.int32,
+        'course': np.int64,
+        'progress': np.int16,
+        'completed': np.bool_,
+        'enrolled_at': np.float64,
+        'completed_at': np.float64,
+    }
+    chunks = {name: [] for name in dtypes}
+
+    def flush(chunk):
+        dept, year, course, progress, completed, enrolled_at, completed_at = zip(*chunk)
+        chunks['department'].append(np.fromiter(
+            (departments.setdefault(d or '', len(departments)) for d in dept), np.int32, len(chunk)
+        ))
+        chunks['year'].append(np.fromiter((y or 0 for y in year), np.int32, len(chunk)))
+        chunks['course'].append(np.fromiter(course, np.int64, len(chunk)))
+        chunks['progress'].append(np.fromiter(progress, np.int16, len(chunk)))
+        chunks['completed'].append(np.fromiter(completed, np.bool_, len(chunk)))
+        chunks['enrolled_at'].append(np.fromiter((t.timestamp() for t in enrolled_at), np.float64, len(chunk)))
+        chunks['completed_at'].append(np.fromiter(
+            (t.timestamp() if t else np.nan for t in completed_at), np.float64, len(chunk)
+        ))
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+    columns = {
+        name: np.concatenate(parts) if parts else np.empty(0, dtype=dtypes[name])
+        for name, parts in chunks.items()
+    }
+    return columns, list(departments)
+
+
+def completion_pivot(columns):
+    # Grouping on one combined (department, year, course) key replaces a
+    # three-way GROUP BY; only occupied cells are materialized.
+    if not len(columns['course']):
+        return []
+    years, year_idx = np.unique(columns['year'], return_inverse=True)
+    courses, course_idx = np.unique(columns['course'], return_inverse=True)
+    shape = (int(columns['department'].max()) + 1, len(years), len(courses))
+
+    key = np.ravel_multi_index((columns['department'], year_idx, course_idx), shape)
+    cells, cell_idx = np.unique(key, return_inverse=True)
+    totals = np.bincount(cell_idx)
+    completed = np.bincount(cell_idx, weights=columns['completed'])
+
+    dept, year, course = np.unravel_index(cells, shape)
+    return [
+        {
+            'department': int(d),
+            'year': int(years[y]) or None,
+            'course': int(courses[c]),
+            'enrolled': int(total),
+            'completed': int(done),
+            'completion_rate': round(float(done / total), 4),
+        }
+        for d, y, c, total, done in zip(dept, year, course, totals, completed)
+    ]
+
+
+def progress_histogram(columns, n_departments):
+    buckets = np.minimum(columns['progress'] // (100 // PROGRESS_BUCKETS), PROGRESS_BUCKETS - 1)
+    buckets = np.maximum(buckets, 0).astype(np.int64)
+    overall = np.bincount(buckets, minlength=PROGRESS_BUCKETS)
+    by_department = np.bincount(
+        columns['department'].astype(np.int64) * PROGRESS_BUCKETS + buckets,
+        minlength=n_departments * PROGRESS_BUCKETS,
+    ).reshape(n_departments, PROGRESS_BUCKETS)
+    return overall.tolist(), by_department.tolist()
+
+
+def _duration_stats(days):
+    if not len(days):
+        return {'count': 0}
+    stats = {'count': int(len(days)), 'mean_days': round(float(days.mean()), 2)}
+    for p, value in zip(PERCENTILES, np.percentile(days, PERCENTILES)):
+        stats[f'p{p}_days'] = round(float(value), 2)
+    return stats
+
+
+def time_to_complete(columns, n_departments):
+    mask = columns['completed'] & ~np.isnan(columns['completed_at'])
+    days = (columns['completed_at'][mask] - columns['enrolled_at'][mask]) / 86400
+    departments = columns['department'][mask]
+
+    # Sort once, then slice each department's contiguous run.
+    order = np.argsort(departments, kind='stable')
+    days_sorted = days[order]
+    bounds = np.searchsorted(departments[order], np.arange(n_departments + 1))
+    by_department = [
+        _duration_stats(days_sorted[bounds[i]:bounds[i + 1]]) for i in range(n_departments)
+    ]
+    return _duration_stats(days), by_department
+
+
+def compute(columns, departments):
+    n_departments = len(departments)
+    overall_progress, progress_by_department = progress_histogram(columns, n_departments)
+    overall_ttc, ttc_by_department = time_to_complete(columns, n_departments)
+    return {
+        'enrollments': int(len(columns['course'])),
+        'departments': [d or None for d in departments],
+        'completion': completion_pivot(columns),
+        'progress_buckets': [f"{i * 10}-{i * 10 + 9 if i < PROGRESS_BUCKETS - 1 else 100}" for i in range(PROGRESS_BUCKETS)],
+        'progress': overall_progress,
+        'progress_by_department': progress_by_department,
+        'time_to_complete': overall_ttc,
+        'time_to_complete_by_department': ttc_by_department,
+    }
+
+
+def cohort_report():
+    key = f"analytics:cohorts:{tenancy.current_tenant_id()}:{data_version()}"
+    report = cache.get(key)
+    metrics.cache_lookup("analytics", report is not None)
+    if report is None:
+        columns, departments = load_columns()
+        report = compute(columns, departments)
+        course_ids = {row['course'] for row in report['completion']}
+        report['courses'] = dict(
+            Course.all_objects.filter(pk__in=course_ids).values_list('pk', 'title')
+        )
+        cache.set(key, report, CACHE_TIMEOUT)
+    return report
@@ -0,0 +1,192 @@
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
+
+from . import audit, permissions
+from .models import (
+    ArchivedEnrollment, ArchivedStudent, Course, CustomUser, Enrollment, ReportJob,
+    StudentProfile, TranscriptSnapshot,
+)
+
+
+# Cold tier for rows the dashboards no longer need. Completed enrollments and
+# graduated students move into ArchivedEnrollment / ArchivedStudent, keeping
+# their ids, so the hot tables and their indexes only hold current work.
+# Transcripts read both tiers (reports.transcript_rows); restore_* moves rows
+# back. Moving rows leaves the counters alone: see counted_archive.
+
+ENROLLMENT_FIELDS = (
+    'pk', 'tenant_id', 'student_id', 'course_id', 'progress', 'completed', 'enrolled_at', 'completed_at',
+)
+
+
+def counted_archive():
+    # Archived enrollments still count: in the student and course counters
+    # (reconcile_counters), the cohort analytics and the catalog's enrolled
+    # flags. Like hot ones, they stop counting once their student or course
+    # is soft-deleted (StudentProfile/Course.soft_delete uncount them);
+    # graduated students are live in ArchivedStudent.
+    return ArchivedEnrollment.objects.filter(
+        Q(student_id__in=StudentProfile.objects.values('pk')) | Q(student_id__in=ArchivedStudent.objects.values('pk')),
+        course_id__in=Course.objects.values('pk'),
+    )
+
+
+def completed_enrollments(before):
+    return Enrollment.objects.filter(completed=True).filter(
+        Q(completed_at__lt=before) | Q(completed_at__isnull=True, enrolled_at__lt=before)
+    )
+
+
+def graduated_students(admitted_before):
+    # Admitted before the given year and nothing left in progress.
+    in_progress = Enrollment.objects.filter(student=OuterRef('pk'), completed=False)
+    return (
+        StudentProfile.objects.filter(user__role='student', year_of_admission__lt=admitted_before)
+        .exclude(Exists(in_progress))
+    )
+
+
+# Shared with purge_deleted.
+
+def raw_delete(queryset):
+    # One DELETE ... WHERE, without loading rows or sending delete signals.
+    return queryset._raw_delete(queryset.db)
+
+
+def delete_snapshots(student_ids):
+    # Files first: the rows are the only record of where they are.
+    snapshots = TranscriptSnapshot.objects.filter(student_id__in=student_ids)
+    for snapshot in snapshots.only('file'):
+        snapshot.file.delete(save=False)
+    raw_delete(snapshots)
+
+
+def _invalidate_later(user_ids):
+    transaction.on_commit(lambda: [permissions.invalidate(user_id) for user_id in user_ids])
+
+
+def _move_enrollments(queryset):
+    rows = list(queryset.values(*ENROLLMENT_FIELDS, course_title=F('course__title')))
+    ArchivedEnrollment.objects.bulk_create([
+        ArchivedEnrollment(
+            id=row['pk'],
+            tenant_id=row['tenant_id'],
+            student_id=row['student_id'],
+            course_id=row['course_id'],
+            course_title=row['course_title'],
+            progress=row['progress'],
+            completed=row['completed'],
+            enrolled_at=row['enrolled_at'],
+            completed_at=row['completed_at'],
+        )
+        for row in rows
+    ])
+    raw_delete(Enrollment.all_objects.filter(pk__in=[row['pk'] for row in rows]))
+    audit.bulk_changed()
+    return len(rows)
+
+
+@transaction.atomic
+def archive_enrollments(ids):
+    return _move_enrollments(Enrollment.objects.filter(pk__in=ids))
+
+
+@transaction.atomic
+def archive_students(ids):
+    profiles = list(StudentProfile.objects.filter(pk__in=ids))
+    ids = [profile.pk for profile in profiles]
+    user_ids = [profile.user_id for profile in profiles]
+
+    moved = _move_enrollments(Enrollment.objects.filter(student_id__in=ids))
+    # Soft-deleted enrollments are no longer counted; they go the way
+    # purge_deleted would have sent them.
+    raw_delete(Enrollment.all_objects.filter(student_id__in=ids))
+    # Snapshots point at the profile; archived transcripts are rendered on
+    # demand from the archive instead.
+    delete_snapshots(ids)
+    raw_delete(ReportJob.all_objects.filter(student_id__in=ids))
+
+    ArchivedStudent.objects.bulk_create([
+        ArchivedStudent(
+            id=profile.pk,
+            tenant_id=profile.tenant_id,
+            user_id=profile.user_id,
+            roll_number=profile.roll_number,
+            department=profile.department,
+            year_of_admission=profile.year_of_admission,
+            profile_picture=profile.profile_picture.name or None,
+        )
+        for profile in profiles
+    ])
+    raw_delete(StudentProfile.all_objects.filter(pk__in=ids))
+    # Accounts stay active: graduates keep a read-only dashboard and their
+    # transcript (permissions.Capabilities.graduated).
+    _invalidate_later(user_ids)
+    audit.bulk_changed()
+    return len(profiles), moved
+
+
+@transaction.atomic
+def restore_enrollments(queryset):
+    # Rows whose student or course is gone from the hot tables, or whose
+    # student re-enrolled in the course since, stay archived.
+    active = Enrollment.objects.filter(student_id=OuterRef('student_id'), course_id=OuterRef('course_id'))
+    restorable = queryset.filter(
+        student_id__in=StudentProfile.objects.values('pk'),
+        course_id__in=Course.objects.values('pk'),
+    ).exclude(Exists(active))
+    rows = list(restorable.values(*ENROLLMENT_FIELDS))
+    Enrollment.all_objects.bulk_create([
+        Enrollment(
+            id=row['pk'],
+            tenant_id=row['tenant_id'],
+            student_id=row['student_id'],
+            course_id=row['course_id'],
+            progress=row['progress'],
+            completed=row['completed'],
+            enrolled_at=row['enrolled_at'],
+            completed_at=row['completed_at'],
+        )
+        for row in rows
+    ])
+    raw_delete(ArchivedEnrollment.objects.filter(pk__in=[row['pk'] for row in rows]))
+    audit.bulk_changed()
+    # Whatever is left in the queryset was skipped.
+    return len(rows), queryset.count()
+
+
+@transaction.atomic
+def restore_students(ids):
+    archived = list(ArchivedStudent.objects.filter(pk__in=ids))
+    ids = [student.pk for student in archived]
+    user_ids = [student.user_id for student in archived]
+    # Profiles come back with the counters of their counted_archive rows,
+    # whichever tier those rows end up in.
+    totals = {
+        row['student_id']: row
+        for row in counted_archive().filter(student_id__in=ids).order_by().values('student_id').annotate(
+            n=Count('pk'), done=Count('pk', filter=Q(completed=True))
+        )
+    }
+
+    StudentProfile.all_objects.bulk_create([
+        StudentProfile(
+            id=student.pk,
+            tenant_id=student.tenant_id,
+            user_id=student.user_id,
+            roll_number=student.roll_number,
+            department=student.department,
+            year_of_admission=student.year_of_admission,
+            profile_picture=student.profile_picture.name or None,
+            enrollment_count=totals.get(student.pk, {}).get('n', 0),
+            completed_count=totals.get(student.pk, {}).get('done', 0),
+        )
+        for student in archived
+    ])
+    raw_delete(ArchivedStudent.objects.filter(pk__in=ids))
+    restored, skipped = restore_enrollments(ArchivedEnrollment.objects.filter(student_id__in=ids))
+    # Graduates archived before accounts were kept active come back too.
+    CustomUser.objects.filter(pk__in=user_ids).update(is_active=True)
+    _invalidate_later(user_ids)
+    audit.bulk_changed()
+    return len(archived), restored, skipped
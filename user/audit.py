@@ -0,0 +1,96 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+
+_buffer = ContextVar("audit_buffer", default=None)
+_actor = ContextVar("audit_actor", default=None)
+
+CREATE, UPDATE, DELETE = "c", "u", "d"
+
+# Archive, restore, purge_deleted and reconcile_counters rewrite rows without
+# audit entries; they bump this instead, and readers keyed on the newest
+# audit id (analytics.data_version) key on it too.
+BULK_VERSION_KEY = "audit:bulk_version"
+
+
+def audit_value(value):
+    if isinstance(value, FieldFile):
+        return value.name or None
+    return value
+
+
+def record(instance, action, changes):
+    from .models import AuditLog
+
+    actor_id = _actor.get()
+    if callable(actor_id):
+        actor_id = actor_id()
+
+    entry = AuditLog(
+        created_at=timezone.now(),
+        actor_id=actor_id,
+        model=instance._meta.model_name,
+        object_id=instance.pk,
+        action=action,
+        changes=changes,
+        tenant_id=getattr(instance, "tenant_id", None),
+    )
+    # Entries only leave the transaction that produced them once it commits;
+    # a rollback drops them together with the change they describe.
+    using = router.db_for_write(type(instance), instance=instance)
+    transaction.on_commit(partial(_enqueue, entry), using=using)
+
+
+def _enqueue(entry):
+    pending = _buffer.get()
+    if pending is None:
+        _write([entry])
+    else:
+        pending.append(entry)
+
+
+def _write(entries):
+    from .models import AuditLog
+
+    if entries:
+        AuditLog.objects.bulk_create(entries)
+
+
+@contextmanager
+def buffer(actor_id=None):
+    # Everything recorded inside the block is written with a single INSERT on
+    # exit. actor_id may be a callable so it is only resolved when needed.
+    pending = []
+    buffer_token = _buffer.set(pending)
+    actor_token = _actor.set(actor_id)
+    try:
+        yield pending
+    finally:
+        _buffer.reset(buffer_token)
+        _actor.reset(actor_token)
+        _write(pending)
+
+
+def bulk_changed():
+    # After commit, so nothing caches the old rows under the new version.
+    transaction.on_commit(_bump_bulk_version)
+
+
+def _bump_bulk_version():
+    if cache.add(BULK_VERSION_KEY, 1, None):
+        return
+    try:
+        cache.incr(BULK_VERSION_KEY)
+    except ValueError:
+        # Evicted between add() and incr().
+        cache.add(BULK_VERSION_KEY, 1, None)
+
+
+def bulk_version():
+    return cache.get(BULK_VERSION_KEY, 0)
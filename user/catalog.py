@@ -0,0 +1,72 @@
+import hashlib
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Count, Max
+from django.utils.text import Truncator
+
+from . import metrics, queries, tenancy
+from .models import ArchivedEnrollment, Course, Enrollment
+
+
+PAGE_SIZE = 12
+CACHE_TIMEOUT = 60 * 15
+
+
+def catalog_version():
+    # Every create, edit and soft delete bumps some course's updated_at, so
+    # the newest one identifies the current catalog (of the current tenant;
+    # all_objects is tenant-scoped). purge_deleted removes rows without
+    # bumping anything, and removing the newest one would bring back an older
+    # maximum whose page may still be cached; the row count changes instead.
+    version = Course.all_objects.aggregate(latest=Max('updated_at'), rows=Count('id'))
+    latest = version['latest'].timestamp() if version['latest'] else 0
+    return f"{latest}.{version['rows']}"
+
+
+def page_number(page):
+    # The raw query string would make "1", "01" and "1 " separate cache
+    # entries (and spaces are invalid memcached keys); anything that is not
+    # a positive integer is page 1, as Paginator.get_page treats it.
+    try:
+        return max(int(page), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def catalog_page(q, page):
+    # The listing is identical for every student, so it is built once per
+    # catalog version and shared through the cache.
+    page = page_number(page)
+    digest = hashlib.sha1(q.encode()).hexdigest()[:16]
+    key = f"catalog:{tenancy.current_tenant_id()}:{catalog_version()}:{digest}:{page}"
+    data = cache.get(key)
+    metrics.cache_lookup("catalog", data is not None)
+    if data is None:
+        qs = queries.catalog_rows().order_by('title')
+        if q:
+            qs = qs.filter(title__icontains=q)
+        page_obj = Paginator(qs, PAGE_SIZE).get_page(page)
+        data = {
+            'courses': [
+                {
+                    'id': c['id'],
+                    'title': c['title'],
+                    'description': Truncator(c['description_preview']).words(25),
+                }
+                for c in page_obj
+            ],
+            'number': page_obj.number,
+            'num_pages': page_obj.paginator.num_pages,
+        }
+        cache.set(key, data, CACHE_TIMEOUT)
+    return data
+
+
+def enrolled_course_ids(profile_id, course_ids):
+    # Archived enrollments are completed ones, so they count as enrolled.
+    if profile_id is None or not course_ids:
+        return set()
+    hot = Enrollment.objects.filter(student_id=profile_id, course_id__in=course_ids).values_list('course_id')
+    archived = ArchivedEnrollment.objects.filter(student_id=profile_id, course_id__in=course_ids).values_list('course_id')
+    return {course_id for course_id, in hot.union(archived)}
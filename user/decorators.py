@@ -1,13 +1,32 @@
-from django.contrib.auth.decorators import user_passes_test
+from functools import wraps
 
-def is_admin(user):
-    return user.is_authenticated and (getattr(user, "role", None) == "admin" or user.is_staff or user.is_superuser)
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth.views import redirect_to_login
 
-def is_student(user):
-    return user.is_authenticated and getattr(user, "role", None) == "student"
+from .permissions import get_capabilities
+
+def capabilities_required(test):
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_view(request, *args, **kwargs):
+                if test(await sync_to_async(get_capabilities)(request)):
+                    return await view_func(request, *args, **kwargs)
+                return redirect_to_login(request.get_full_path(), 'login')
+        else:
+            @wraps(view_func)
+            def _wrapped_view(request, *args, **kwargs):
+                if test(get_capabilities(request)):
+                    return view_func(request, *args, **kwargs)
+                return redirect_to_login(request.get_full_path(), 'login')
+        return _wrapped_view
+    return decorator
+
+def capability_required(capability):
+    return capabilities_required(lambda caps: caps.can(capability))
 
 def admin_required(view_func):
-    return user_passes_test(is_admin, login_url='login')(view_func)
+    return capabilities_required(lambda caps: caps.is_admin)(view_func)
 
 def student_required(view_func):
-    return user_passes_test(is_student, login_url='login')(view_func)
+    return capabilities_required(lambda caps: caps.is_student)(view_func)
@@ -1,9 +1,26 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
+from django.core.files.uploadedfile import UploadedFile
+
+from . import uploads
 from .models import CustomUser, StudentProfile, Course, Enrollment
 
 
-class CustomUserRegisterForm(UserCreationForm):
+class GlobalUsernameMixin:
+    # Usernames are unique across tenants, but CustomUser.objects only sees
+    # the current one; the unscoped manager catches a name taken elsewhere
+    # before the insert does.
+    def clean_username(self):
+        username = self.cleaned_data.get('username')
+        if username and (
+            CustomUser._base_manager.filter(username__iexact=username)
+            .exclude(pk=self.instance.pk).exists()
+        ):
+            raise forms.ValidationError("A user with that username already exists.")
+        return username
+
+
+class CustomUserRegisterForm(GlobalUsernameMixin, UserCreationForm):
     class Meta:
         model = CustomUser
         fields = ['username', 'email', 'password1', 'password2']
@@ -13,13 +30,6 @@ class CustomUserRegisterForm(UserCreationForm):
         for field in self.fields.values():
             field.widget.attrs.update({'class': 'form-control'})
 
-    def save(self, commit=True):
-        user = super().save(commit=False)
-        user.role = "student"
-        if commit:
-            user.save()
-        return user
-
 
 class CustomLoginForm(AuthenticationForm):
     def __init__(self, *args, **kwargs):
@@ -28,22 +38,60 @@ class CustomLoginForm(AuthenticationForm):
             field.widget.attrs.update({'class': 'form-control'})
 
 
-class AdminCreateStudentUserForm(forms.ModelForm):
+class AdminCreateStudentUserForm(GlobalUsernameMixin, forms.ModelForm):
     class Meta:
         model = CustomUser
         fields = ['username', 'email', 'first_name', 'last_name']
 
 
-class StudentProfileAdminForm(forms.ModelForm):
+class ProfilePictureForm(forms.ModelForm):
+    # profile_picture is not a model field of these forms: the upload is only
+    # stored as pending_picture, and user.uploads checks, decodes and resizes
+    # it off the request path.
+    profile_picture = forms.FileField(
+        required=False,
+        widget=forms.ClearableFileInput(attrs={'accept': 'image/*'}),
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.profile_picture:
+            self.initial.setdefault('profile_picture', self.instance.profile_picture)
+
+    def clean_profile_picture(self):
+        picture = self.cleaned_data['profile_picture']
+        rejection = getattr(picture, 'rejection', None)
+        if rejection:
+            raise forms.ValidationError(rejection)
+        return picture
+
+    def save(self, commit=True):
+        profile = super().save(commit=False)
+        picture = self.cleaned_data.get('profile_picture')
+        uploaded = isinstance(picture, UploadedFile)
+        if picture is False:
+            profile.profile_picture = None
+        elif uploaded:
+            profile.pending_picture = picture
+            profile.picture_status = StudentProfile.PICTURE_PENDING
+            profile.picture_error = ''
+        if commit:
+            profile.save()
+            if uploaded:
+                uploads.submit(profile.pk)
+        return profile
+
+
+class StudentProfileAdminForm(ProfilePictureForm):
     class Meta:
         model = StudentProfile
-        fields = ['department', 'year_of_admission', 'profile_picture']
+        fields = ['department', 'year_of_admission']
 
 
-class StudentProfileForm(forms.ModelForm):
+class StudentProfileForm(ProfilePictureForm):
     class Meta:
         model = StudentProfile
-        fields = ['department', 'year_of_admission', 'profile_picture']
+        fields = ['department', 'year_of_admission']
         widgets = {
             'year_of_admission': forms.NumberInput(attrs={'min': 1900, 'max': 2100}),
         }
@@ -60,6 +108,14 @@ class CourseForm(forms.ModelForm):
         model = Course
         fields = ['title', 'description']
 
+    def clean_title(self):
+        # Titles are unique per tenant. tenant is not a form field, so model
+        # validation skips that constraint; the scoped manager checks it here.
+        title = self.cleaned_data['title']
+        if Course.objects.filter(title=title).exclude(pk=self.instance.pk).exists():
+            raise forms.ValidationError("A course with this title already exists.")
+        return title
+
 
 class EnrollmentForm(forms.ModelForm):
     class Meta:
@@ -68,6 +124,9 @@ class EnrollmentForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # Built per form so the managers scope the choices to the request's
+        # tenant; the field defaults are built once at import.
         self.fields['student'].queryset = StudentProfile.objects.filter(
             user__role="student"
         )
+        self.fields['course'].queryset = Course.objects.all()
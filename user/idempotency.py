@@ -0,0 +1,69 @@
+import time
+import uuid
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils.functional import SimpleLazyObject
+
+
+FIELD = "idempotency_key"
+HEADER = "HTTP_IDEMPOTENCY_KEY"
+RESULT_TIMEOUT = 60 * 10
+PENDING_TIMEOUT = 30
+WAIT_SECONDS = 5.0
+PENDING = "pending"
+
+
+def _cache_key(request, key):
+    user_id = request.user.pk if request.user.is_authenticated else ""
+    return f"idempotency:{request.path}:{user_id}:{key[:64]}"
+
+
+def _wait_for_result(cache_key):
+    # Another request with the same key is still running; give it a moment
+    # to finish so the duplicate can replay its outcome.
+    deadline = time.monotonic() + WAIT_SECONDS
+    while time.monotonic() < deadline:
+        stored = cache.get(cache_key)
+        if stored != PENDING:
+            return stored
+        time.sleep(0.1)
+    return None
+
+
+def idempotent(view_func):
+    # Successful POSTs (redirects) are remembered per idempotency key, so a
+    # resubmitted form replays the redirect without touching the database.
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        key = None
+        if request.method == "POST":
+            key = request.POST.get(FIELD) or request.META.get(HEADER)
+        if not key:
+            return view_func(request, *args, **kwargs)
+
+        cache_key = _cache_key(request, key)
+        if not cache.add(cache_key, PENDING, PENDING_TIMEOUT):
+            stored = _wait_for_result(cache_key)
+            if stored is None:
+                return HttpResponse("This request is already being processed.", status=409)
+            return HttpResponseRedirect(stored["location"])
+
+        try:
+            response = view_func(request, *args, **kwargs)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+
+        if response.status_code in (301, 302, 303):
+            cache.set(cache_key, {"location": response["Location"]}, RESULT_TIMEOUT)
+        else:
+            # Validation errors re-render the form; let the user retry.
+            cache.delete(cache_key)
+        return response
+    return _wrapped_view
+
+
+def idempotency_key(request):
+    return {"idempotency_key": SimpleLazyObject(lambda: uuid.uuid4().hex)}
@@ -0,0 +1,54 @@
+from importlib import import_module
+
+from asgiref.sync import iscoroutinefunction
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import URLPattern, URLResolver, get_resolver
+
+
+def lazy_view(path, is_async=False, **initkwargs):
+    # Stands in for the view at "module.name" and imports it on first dispatch,
+    # so a worker boots without the view modules and the forms they pull in.
+    # Async views must say so up front: Django decides how to call a view from
+    # the callable it is given.
+    module_name, attr = path.rsplit(".", 1)
+    resolved = None
+
+    def resolve():
+        nonlocal resolved
+        if resolved is None:
+            target = getattr(import_module(module_name), attr)
+            view = target.as_view(**initkwargs) if hasattr(target, "as_view") else target
+            if iscoroutinefunction(view) != is_async:
+                raise ImproperlyConfigured(
+                    f"lazy_view({path!r}) needs is_async={iscoroutinefunction(view)}."
+                )
+            resolved = view
+        return resolved
+
+    if is_async:
+        async def view(request, *args, **kwargs):
+            return await resolve()(request, *args, **kwargs)
+    else:
+        def view(request, *args, **kwargs):
+            return resolve()(request, *args, **kwargs)
+
+    view.lazy_path = path
+    view.resolve = resolve
+    return view
+
+
+def lazy_views(patterns=None):
+    # Every lazy view under the root URLconf, including included ones.
+    patterns = get_resolver().url_patterns if patterns is None else patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from lazy_views(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and hasattr(pattern.callback, "lazy_path"):
+            yield pattern.callback
+
+
+def import_all():
+    # Used when gunicorn preloads the app: import everything once in the master
+    # so forked workers share it instead of each importing on first request.
+    for view in lazy_views():
+        view.resolve()
@@ -0,0 +1,126 @@
+import asyncio
+import itertools
+import threading
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import tenancy
+
+
+QUEUE_SIZE = 100
+
+
+class LocalBroker:
+    # Fans events out to subscribers in this process. Each subscriber is an
+    # asyncio.Queue owned by the event loop serving its SSE connection;
+    # publishers may run in any thread.
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers = {(loop, q) for loop, q in self._subscribers if q is not queue}
+
+    def publish(self, event):
+        self.fan_out(event)
+
+    def fan_out(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_offer, queue, event)
+
+
+def _offer(queue, event):
+    # A subscriber that cannot keep up loses events rather than memory.
+    if not queue.full():
+        queue.put_nowait(event)
+
+
+class DatabaseBroker(LocalBroker):
+    # Cross-process stand-in: events are written to LiveEvent and one poller
+    # per process relays new rows to its local subscribers.
+    poll_interval = 1.0
+    retention = timedelta(minutes=10)
+    # Publishers trim too: pollers only run while an admin dashboard is open,
+    # and rows keep arriving when none is.
+    trim_every = 200
+
+    def __init__(self):
+        super().__init__()
+        self._poller = None
+        self._published = itertools.count(1)
+
+    def subscribe(self):
+        queue = super().subscribe()
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+        return queue
+
+    def publish(self, event):
+        from .models import LiveEvent
+
+        LiveEvent.objects.create(payload=event)
+        if next(self._published) % self.trim_every == 0:
+            self._trim()
+
+    async def _poll(self):
+        from .models import LiveEvent
+
+        last_id = await sync_to_async(self._latest_id)()
+        polls = 0
+        while self._subscribers:
+            await asyncio.sleep(self.poll_interval)
+            rows = await sync_to_async(list)(
+                LiveEvent.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', 'payload')[:500]
+            )
+            for pk, payload in rows:
+                last_id = pk
+                self.fan_out(payload)
+
+            polls += 1
+            if polls % 60 == 0:
+                await sync_to_async(self._trim)()
+
+    def _latest_id(self):
+        from .models import LiveEvent
+
+        return LiveEvent.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+    def _trim(self):
+        from .models import LiveEvent
+
+        LiveEvent.objects.filter(created_at__lt=timezone.now() - self.retention).delete()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.LIVE_FEED_BACKEND)()
+    return _broker
+
+
+def publish(event_type, tenant=None, **data):
+    # Only committed changes are announced. Each feed only relays its own
+    # tenant's events.
+    event = {'type': event_type, 'tenant': tenant or tenancy.current_tenant_id(), **data}
+    transaction.on_commit(lambda: get_broker().publish(event))
@@ -0,0 +1,75 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from user import archive
+
+
+class Command(BaseCommand):
+    help = "Move old completed enrollments and graduated students to the archive tables in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--completed-days",
+            type=int,
+            default=365,
+            help="Archive enrollments completed at least this many days ago.",
+        )
+        parser.add_argument(
+            "--graduated-years",
+            type=int,
+            default=4,
+            help="Archive students admitted at least this many years ago with nothing in progress.",
+        )
+        parser.add_argument("--skip-students", action="store_true", help="Only archive enrollments.")
+        parser.add_argument("--dry-run", action="store_true", help="Count what would be archived.")
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.0,
+            help="Seconds to pause between batches to let other writers in.",
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        self.sleep = options["sleep"]
+        self.dry_run = options["dry_run"]
+
+        # Students first: their enrollments go with them in the same batch.
+        if not options["skip_students"]:
+            self.run(
+                "students",
+                archive.graduated_students(timezone.now().year - options["graduated_years"] + 1),
+                lambda ids: archive.archive_students(ids)[0],
+            )
+        self.run(
+            "enrollments",
+            archive.completed_enrollments(timezone.now() - timedelta(days=options["completed_days"])),
+            archive.archive_enrollments,
+        )
+
+    def run(self, label, queryset, archive_batch):
+        total = queryset.count()
+        if self.dry_run:
+            self.stdout.write(f"Would archive {total} {label}.")
+            return
+
+        self.stdout.write(f"Archiving {total} {label}...")
+        done = 0
+        while True:
+            ids = list(queryset.order_by("pk").values_list("pk", flat=True)[:self.batch_size])
+            if not ids:
+                break
+            # Each batch is its own transaction (see user.archive).
+            moved = archive_batch(ids)
+            if not moved:
+                break
+            done += moved
+            self.stdout.write(f"  {label}: {done}/{total}")
+            if self.sleep:
+                time.sleep(self.sleep)
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {done} {label}."))
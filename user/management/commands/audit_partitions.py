@@ -0,0 +1,53 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections, router, transaction
+
+from user.models import AuditLog
+
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+class Command(BaseCommand):
+    help = "Create upcoming monthly partitions of the audit log (PostgreSQL only)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=3,
+            help="Number of months ahead of the current one to create.",
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[router.db_for_write(AuditLog)]
+        if connection.vendor != "postgresql":
+            self.stdout.write("Audit log partitioning needs PostgreSQL; nothing to do.")
+            return
+
+        table = AuditLog._meta.db_table
+        first = date.today().replace(day=1)
+        with connection.cursor() as cursor:
+            for offset in range(options["months"] + 1):
+                start = _add_months(first, offset)
+                end = _add_months(first, offset + 1)
+                partition = f"{table}_y{start.year}m{start.month:02d}"
+                # A month whose rows already landed in the default partition
+                # cannot be attached; it is skipped so later months still get
+                # created. Migration 0007 creates the first two up front.
+                try:
+                    with transaction.atomic(using=connection.alias):
+                        cursor.execute(
+                            f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {table} "
+                            f"FOR VALUES FROM (%s) TO (%s)",
+                            [start.isoformat(), end.isoformat()],
+                        )
+                except DatabaseError as exc:
+                    self.stderr.write(f"  {partition}: skipped ({exc})")
+                    continue
+                self.stdout.write(f"  {partition}: {start} .. {end}")
+
+        self.stdout.write(self.style.SUCCESS("Audit log partitions are in place."))
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from user import analytics
+
+
+class Command(BaseCommand):
+    help = "Time the cohort analytics aggregations on synthetic enrollment columns."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5_000_000)
+        parser.add_argument("--departments", type=int, default=12)
+        parser.add_argument("--courses", type=int, default=400)
+        parser.add_argument(
+            "--from-db",
+            action="store_true",
+            help="Also time streaming the real Enrollment table into columns.",
+        )
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        rng = np.random.default_rng(0)
+
+        enrolled_at = rng.uniform(1.5e9, 1.7e9, rows)
+        completed = rng.random(rows) < 0.4
+        columns = {
+            "department": rng.integers(0, options["departments"], rows, dtype=np.int32),
+            "year": rng.integers(2015, 2026, rows, dtype=np.int32),
+            "course": rng.integers(1, options["courses"] + 1, rows, dtype=np.int64),
+            "progress": np.where(completed, 100, rng.integers(0, 100, rows)).astype(np.int16),
+            "completed": completed,
+            "enrolled_at": enrolled_at,
+            "completed_at": np.where(completed, enrolled_at + rng.uniform(0, 2e7, rows), np.nan),
+        }
+        departments = [f"Dept {i}" for i in range(options["departments"])]
+
+        start = time.perf_counter()
+        report = analytics.compute(columns, departments)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"compute: {rows} enrollments, {len(report['completion'])} pivot cells in {elapsed:.2f}s"
+        )
+
+        if options["from_db"]:
+            start = time.perf_counter()
+            columns, departments = analytics.load_columns()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"load_columns: {len(columns['course'])} rows in {elapsed:.2f}s")
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+
+from user.middleware import MetricsMiddleware
+
+
+class Command(BaseCommand):
+    help = "Measure the per-request overhead added by MetricsMiddleware."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20000)
+        parser.add_argument(
+            "--budget-us",
+            type=float,
+            default=50.0,
+            help="Fail if the overhead per request exceeds this many microseconds.",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        request = RequestFactory().get("/courses/")
+        request.resolver_match = resolve("/courses/")
+
+        def view(request):
+            return HttpResponse("ok")
+
+        bare = self._time(view, request, iterations)
+        wrapped = self._time(MetricsMiddleware(view), request, iterations)
+        overhead_us = (wrapped - bare) / iterations * 1e6
+
+        self.stdout.write(
+            f"{iterations} requests: bare {bare:.3f}s, instrumented {wrapped:.3f}s, "
+            f"overhead {overhead_us:.1f}us/request"
+        )
+        if overhead_us > options["budget_us"]:
+            raise CommandError(
+                f"Metrics overhead {overhead_us:.1f}us exceeds budget of {options['budget_us']}us."
+            )
+
+    def _time(self, handler, request, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            handler(request)
+        return time.perf_counter() - start
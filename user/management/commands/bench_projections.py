@@ -0,0 +1,213 @@
+from collections import Counter
+import statistics
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.signals import post_init
+
+from user import queries, tenancy
+from user.models import Course, CustomUser, Enrollment, StudentProfile, Tenant
+
+
+SLUG = "bench-projections"
+PER_STUDENT = 5
+PAGE = 10
+WORDS = (
+    "lecture seminar laboratory assessment syllabus reading workshop project "
+    "tutorial revision practical fieldwork examination coursework"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Compare what each page fetched before the projections in queries.py with what it fetches now."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=500)
+        parser.add_argument("--courses", type=int, default=40)
+        parser.add_argument("--description-words", type=int, default=300, help="Words per course description.")
+        parser.add_argument("--repeat", type=int, default=50, help="Timed runs per page.")
+        parser.add_argument("--cleanup", action="store_true", help="Delete the bench tenant and exit.")
+
+    def handle(self, *args, **options):
+        if options["cleanup"]:
+            self._cleanup()
+            return
+
+        tenant = Tenant.objects.filter(slug=SLUG).first() or self._tenant(
+            options["students"], options["courses"], options["description_words"]
+        )
+        with tenancy.use(tenant.pk):
+            pages = _pages()
+            self.stdout.write(
+                f"{'page':<18}{'':>7}{'queries':>9}{'columns':>9}{'bytes':>10}{'objects':>9}{'time':>11}"
+            )
+            for name, (before, after) in pages.items():
+                old, new = self._measure(before, options["repeat"]), self._measure(after, options["repeat"])
+                for label, row in (("before", old), ("after", new)):
+                    self.stdout.write(
+                        f"{name if label == 'before' else '':<18}{label:>7}{row['queries']:>9}{row['columns']:>9}"
+                        f"{row['bytes']:>10}{row['objects']:>9}{row['time'] * 1000:>8.2f} ms"
+                    )
+                saved = 1 - new["bytes"] / old["bytes"] if old["bytes"] else 0
+                self.stdout.write(f"{'':<18}{'saved':>7}{'':>18}{saved:>10.0%}")
+
+    def _measure(self, page, repeat):
+        # Every query the page runs is recorded and replayed through a plain
+        # cursor to add up the column values the database sends; objects
+        # are the model instances Django builds on the way.
+        executed, built = [], []
+
+        def record(execute, sql, params, many, context):
+            executed.append((sql, params))
+            return execute(sql, params, many, context)
+
+        def count(sender, **kwargs):
+            built.append(sender)
+
+        post_init.connect(count, weak=False)
+        try:
+            with connection.execute_wrapper(record):
+                page()
+        finally:
+            post_init.disconnect(count)
+
+        columns = fetched = 0
+        with connection.cursor() as cursor:
+            for sql, params in executed:
+                cursor.execute(sql, params)
+                columns += len(cursor.description)
+                fetched += sum(_size(value) for row in cursor.fetchall() for value in row)
+
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            page()
+            samples.append(time.perf_counter() - start)
+        return {
+            "queries": len(executed), "columns": columns, "bytes": fetched,
+            "objects": len(built), "time": statistics.median(samples),
+        }
+
+    @transaction.atomic
+    def _tenant(self, students, courses, words):
+        tenant = Tenant.objects.create(name="Projection bench", slug=SLUG)
+        password = make_password(None)
+        users = CustomUser.objects.bulk_create([
+            CustomUser(
+                username=f"{SLUG}-{i}", email=f"student{i}@example.com", first_name="Student",
+                last_name=str(i), password=password, role="student", tenant=tenant,
+            )
+            for i in range(students)
+        ])
+        if not all(user.pk for user in users):
+            users = CustomUser.objects.filter(tenant=tenant).order_by("pk")
+        profiles = StudentProfile.objects.bulk_create([
+            StudentProfile(
+                user=user, tenant=tenant, roll_number=f"S{i + 1:04d}", department=f"Dept {i % 8}",
+                enrollment_count=PER_STUDENT,
+            )
+            for i, user in enumerate(users)
+        ])
+        if not all(profile.pk for profile in profiles):
+            profiles = list(StudentProfile.objects.filter(tenant=tenant).order_by("pk"))
+        pairs = [(i, (i + j) % courses) for i in range(len(profiles)) for j in range(PER_STUDENT)]
+        totals = Counter(course for _, course in pairs)
+        catalog = Course.objects.bulk_create([
+            Course(
+                title=f"Course {i}", tenant=tenant, enrollment_count=totals[i],
+                description=" ".join(WORDS[(i + w) % len(WORDS)] for w in range(words)),
+            )
+            for i in range(courses)
+        ])
+        if not all(course.pk for course in catalog):
+            catalog = list(Course.objects.filter(tenant=tenant).order_by("pk"))
+        Enrollment.objects.bulk_create([
+            Enrollment(student=profiles[i], course=catalog[course], tenant=tenant)
+            for i, course in pairs
+        ], batch_size=2000)
+        return tenant
+
+    def _cleanup(self):
+        tenants = Tenant.objects.filter(slug=SLUG)
+        with transaction.atomic():
+            for model in (Enrollment, StudentProfile, Course, CustomUser):
+                model._base_manager.filter(tenant__in=tenants).delete()
+            deleted, _ = tenants.delete()
+        self.stdout.write(f"Deleted {deleted} tenants.")
+
+
+def _size(value):
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, (bytes, memoryview)):
+        return len(value)
+    return len(str(value))
+
+
+def _pages():
+    # For each page, what views.py fetched before the projections and what
+    # it fetches now, reading the attributes its template reads.
+    profile_id = StudentProfile.objects.order_by("pk").values_list("pk", flat=True).first()
+    enrollment_id = Enrollment.objects.order_by("pk").values_list("pk", flat=True).first()
+    search = Q(student__user__username__icontains="1") | Q(course__title__icontains="1")
+
+    def student_rows(qs):
+        for s in qs.order_by("roll_number")[:PAGE]:
+            s.roll_number, s.department, s.user.get_full_name(), s.user.username, s.user.email
+
+    def student_card(qs):
+        p = qs.get(pk=profile_id)
+        p.roll_number, p.department, p.year_of_admission, p.profile_picture, p.user.username, p.user.email
+
+    def course_rows(qs):
+        for c in qs.order_by("-id")[:PAGE]:
+            c.title, c.completion_rate
+
+    def enrollment_rows(qs):
+        for e in qs.order_by("-id")[:PAGE]:
+            e.completed, e.student.user.username, e.course.title
+
+    def enrollment_card(qs):
+        e = qs.get(pk=enrollment_id)
+        e.student.user.username, e.course.title
+
+    return {
+        "student_list": (
+            lambda: student_rows(StudentProfile.objects.select_related("user").filter(user__role="student")),
+            lambda: student_rows(queries.student_rows()),
+        ),
+        "student_detail": (
+            lambda: student_card(StudentProfile.objects),
+            lambda: student_card(queries.student_card()),
+        ),
+        "student_dashboard": (
+            lambda: [(e.course.title, e.course.description) for e in
+                     Enrollment.objects.filter(student_id=profile_id).select_related("course")],
+            lambda: list(queries.dashboard_enrollments(profile_id)),
+        ),
+        "course_list": (
+            lambda: course_rows(Course.objects),
+            lambda: course_rows(queries.course_rows()),
+        ),
+        "course_catalog": (
+            lambda: list(Course.objects.order_by("title").values("id", "title", "description")[:12]),
+            lambda: list(queries.catalog_rows().order_by("title")[:12]),
+        ),
+        "enrollment_list": (
+            lambda: enrollment_rows(Enrollment.objects.select_related("student__user", "course")),
+            lambda: list(queries.enrollment_rows()[:PAGE]),
+        ),
+        "enrollment_search": (
+            lambda: enrollment_rows(Enrollment.objects.select_related("student__user", "course").filter(search)),
+            lambda: list(queries.enrollment_rows().filter(search)[:PAGE]),
+        ),
+        "enrollment_delete": (
+            lambda: enrollment_card(Enrollment.objects),
+            lambda: enrollment_card(queries.enrollment_card()),
+        ),
+    }
@@ -0,0 +1,109 @@
+from collections import Counter
+import statistics
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from user import tenancy
+from user.models import Course, CustomUser, Enrollment, StudentProfile, Tenant
+
+
+PREFIX = "bench-"
+PER_STUDENT = 5
+
+
+class Command(BaseCommand):
+    help = "Time one tenant's queries while the other tenants' tables grow."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--steps", type=int, default=4, help="Growth steps to time.")
+        parser.add_argument("--tenants", type=int, default=5, help="Tenants added per step.")
+        parser.add_argument("--students", type=int, default=2000, help="Students per added tenant.")
+        parser.add_argument("--courses", type=int, default=40)
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query.")
+        parser.add_argument("--cleanup", action="store_true", help="Delete the bench tenants and exit.")
+
+    def handle(self, *args, **options):
+        if options["cleanup"]:
+            self._cleanup()
+            return
+
+        probe = self._tenant("probe", 200, options["courses"])
+        self.stdout.write(f"{'rows':>10}  " + "  ".join(f"{name:>14}" for name in QUERIES))
+        for step in range(options["steps"] + 1):
+            if step:
+                for _ in range(options["tenants"]):
+                    self._tenant(None, options["students"], options["courses"])
+            rows = Enrollment.all_objects.count()
+            with tenancy.use(probe.pk):
+                timings = [self._time(query, options["repeat"]) for query in QUERIES.values()]
+            self.stdout.write(f"{rows:>10}  " + "  ".join(f"{t * 1000:>11.2f} ms" for t in timings))
+
+    def _time(self, query, repeat):
+        query()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            query()
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples)
+
+    @transaction.atomic
+    def _tenant(self, name, students, courses):
+        number = Tenant.objects.filter(slug__startswith=PREFIX).count()
+        tenant = Tenant.objects.create(name=name or f"Bench {number}", slug=f"{PREFIX}{name or number}")
+        password = make_password(None)
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f"{tenant.slug}-{i}", password=password, role="student", tenant=tenant)
+            for i in range(students)
+        ])
+        if not all(user.pk for user in users):
+            users = CustomUser.objects.filter(tenant=tenant).order_by("pk")
+        # Counters are filled in as the enrollment signals would have done,
+        # so the popularity query and --cleanup see consistent rows.
+        profiles = StudentProfile.objects.bulk_create([
+            StudentProfile(
+                user=user, tenant=tenant, roll_number=f"S{i + 1:04d}", department=f"Dept {i % 8}",
+                enrollment_count=PER_STUDENT,
+            )
+            for i, user in enumerate(users)
+        ])
+        if not all(profile.pk for profile in profiles):
+            profiles = list(StudentProfile.objects.filter(tenant=tenant).order_by("pk"))
+        pairs = [(i, (i + j) % courses) for i in range(len(profiles)) for j in range(PER_STUDENT)]
+        totals = Counter(course for _, course in pairs)
+        catalog = Course.objects.bulk_create([
+            Course(title=f"Course {i}", description="", tenant=tenant, enrollment_count=totals[i])
+            for i in range(courses)
+        ])
+        if not all(course.pk for course in catalog):
+            catalog = list(Course.objects.filter(tenant=tenant).order_by("pk"))
+        Enrollment.objects.bulk_create([
+            Enrollment(student=profiles[i], course=catalog[course], tenant=tenant)
+            for i, course in pairs
+        ], batch_size=2000)
+        return tenant
+
+    def _cleanup(self):
+        tenants = Tenant.objects.filter(slug__startswith=PREFIX)
+        with transaction.atomic():
+            for model in (Enrollment, StudentProfile, Course, CustomUser):
+                model._base_manager.filter(tenant__in=tenants).delete()
+            deleted, _ = tenants.delete()
+        self.stdout.write(f"Deleted {deleted} tenants.")
+
+
+# The probe tenant's hot paths: student list, course popularity and the
+# recent-enrollments page.
+QUERIES = {
+    "students": lambda: list(
+        StudentProfile.objects.select_related("user").order_by("roll_number")[:20]
+    ),
+    "popular": lambda: list(Course.objects.order_by("-enrollment_count")[:10]),
+    "recent": lambda: list(
+        Enrollment.objects.order_by("-id").values_list("id", "student_id", "course_id")[:20]
+    ),
+    "count": lambda: Enrollment.objects.count(),
+}
@@ -0,0 +1,88 @@
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import connections, router, transaction
+
+from user import tenancy
+from user.models import Enrollment, Tenant
+
+
+class Command(BaseCommand):
+    help = "Partition enrollments by tenant and keep one partition per tenant (PostgreSQL only)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Rebuild the enrollment table as a partitioned table. Locks it while rows are copied.",
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[router.db_for_write(Enrollment)]
+        if connection.vendor != "postgresql":
+            self.stdout.write("Enrollment partitioning needs PostgreSQL; nothing to do.")
+            return
+
+        table = Enrollment._meta.db_table
+        if not tenancy.enrollment_is_partitioned(connection, table):
+            if not options["convert"]:
+                self.stdout.write(f"{table} is not partitioned; run with --convert first.")
+                return
+            with transaction.atomic(using=connection.alias):
+                self._convert(connection, table)
+
+        # New tenants get theirs from the Tenant post_save signal; this
+        # covers tenants created before the table was converted.
+        for tenant_id in Tenant.objects.values_list("pk", flat=True):
+            tenancy.create_enrollment_partition(connection, table, tenant_id)
+            self.stdout.write(f"  {table}_t{tenant_id}")
+
+        self.stdout.write(self.style.SUCCESS("Enrollment partitions are in place."))
+
+    def _convert(self, connection, table):
+        old = f"{table}_unpartitioned"
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(f"ALTER TABLE {table} RENAME TO {old}")
+
+            # Index and foreign key definitions are replayed on the new table
+            # once the old one, which owns the names, is gone.
+            cursor.execute(
+                "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i "
+                "WHERE i.indrelid = to_regclass(%s) AND NOT i.indisprimary",
+                [old],
+            )
+            indexes = [row[0] for row in cursor.fetchall()]
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+                [old],
+            )
+            foreign_keys = cursor.fetchall()
+            cursor.execute("SELECT max(id) FROM " + old)
+            last_id = cursor.fetchone()[0]
+
+            # The partition key has to be part of the primary key. Django
+            # keeps treating id as the primary key, which the identity column
+            # makes unique in practice (as with the audit log).
+            cursor.execute(
+                f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING IDENTITY, "
+                f"PRIMARY KEY (id, tenant_id)) PARTITION BY LIST (tenant_id)"
+            )
+            cursor.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+            for tenant_id in Tenant.objects.values_list("pk", flat=True):
+                tenancy.create_enrollment_partition(connection, table, tenant_id)
+
+            cursor.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+            cursor.execute(f"DROP TABLE {old}")
+
+            on_old = re.compile(rf" ON (ONLY )?(\w+\.)?{old} ")
+            for definition in indexes:
+                cursor.execute(on_old.sub(f" ON {table} ", definition))
+            for name, definition in foreign_keys:
+                cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+            if last_id:
+                cursor.execute(
+                    "SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)", [table, last_id]
+                )
+        self.stdout.write(f"Converted {table} to LIST partitions on tenant_id.")
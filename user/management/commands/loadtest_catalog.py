@@ -0,0 +1,128 @@
+import random
+import statistics
+import threading
+import time
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from user import tenancy
+from user.models import CustomUser, Course, StudentProfile
+
+
+PREFIX = "loadtest_"
+
+
+class Command(BaseCommand):
+    help = "Drive the student course catalog with many concurrent logged-in students."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=300)
+        parser.add_argument("--requests", type=int, default=5, help="Catalog views per student.")
+        parser.add_argument("--enroll", action="store_true", help="Each student also self-enrolls once.")
+        parser.add_argument("--cleanup", action="store_true", help="Delete the load-test students and exit.")
+
+    def handle(self, *args, **options):
+        if options["cleanup"]:
+            deleted, _ = CustomUser.objects.filter(username__startswith=PREFIX).delete()
+            self.stdout.write(f"Deleted {deleted} rows.")
+            return
+
+        # Allows the test client's host and keeps enrollment mail in memory.
+        setup_test_environment(debug=False)
+
+        users = self._students(options["students"])
+        course_ids = list(Course.objects.values_list("pk", flat=True))
+        if not course_ids:
+            self.stderr.write("No courses to browse; create some first.")
+            return
+        pages = max(1, -(-len(course_ids) // 12))
+
+        catalog_url = reverse("course_catalog")
+        latencies = {"catalog": [], "enroll": []}
+        errors = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(users))
+
+        # Sessions are created up front so only the measured requests overlap.
+        clients = []
+        for user in users:
+            client = Client()
+            client.force_login(user)
+            clients.append(client)
+
+        def request(name, timings, method, *args):
+            start = time.perf_counter()
+            try:
+                response = method(*args)
+            except Exception as exc:
+                errors.append(f"{name}: {exc}")
+                return
+            timings[name].append(time.perf_counter() - start)
+            if response.status_code not in (200, 302):
+                errors.append(f"{name}: HTTP {response.status_code}")
+
+        def student(client):
+            timings = {"catalog": [], "enroll": []}
+            barrier.wait()
+            try:
+                for _ in range(options["requests"]):
+                    request("catalog", timings, client.get, catalog_url, {"page": random.randint(1, pages)})
+                if options["enroll"]:
+                    request(
+                        "enroll", timings, client.post,
+                        reverse("course_self_enroll", args=[random.choice(course_ids)]),
+                        {"idempotency_key": uuid.uuid4().hex},
+                    )
+            finally:
+                connection.close()
+            with lock:
+                for name, values in timings.items():
+                    latencies[name].extend(values)
+
+        threads = [threading.Thread(target=student, args=(client,)) for client in clients]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        total = sum(len(values) for values in latencies.values())
+        self.stdout.write(
+            f"{len(users)} students, {total} requests in {elapsed:.2f}s ({total / elapsed:.0f} req/s), "
+            f"{len(errors)} errors"
+        )
+        for error in sorted(set(errors))[:5]:
+            self.stdout.write(f"  error: {error}")
+        for name, values in latencies.items():
+            if not values:
+                continue
+            values.sort()
+            p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+            self.stdout.write(
+                f"  {name}: n={len(values)} p50={statistics.median(values) * 1000:.1f}ms "
+                f"p95={p95 * 1000:.1f}ms max={values[-1] * 1000:.1f}ms"
+            )
+
+    def _students(self, count):
+        existing = CustomUser.objects.filter(username__startswith=PREFIX).count()
+        if existing < count:
+            # Bulk inserts skip the welcome-mail signal; profiles are added alongside.
+            password = make_password(None)
+            tenant_id = tenancy.default_tenant_id()
+            created = CustomUser.objects.bulk_create([
+                CustomUser(username=f"{PREFIX}{i}", password=password, role="student", tenant_id=tenant_id)
+                for i in range(existing, count)
+            ])
+            if not all(user.pk for user in created):
+                created = CustomUser.objects.filter(username__in=[u.username for u in created])
+            StudentProfile.objects.bulk_create([
+                StudentProfile(user=user, tenant_id=user.tenant_id) for user in created
+            ])
+        return list(CustomUser.objects.filter(username__startswith=PREFIX).order_by("pk")[:count])
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from user import uploads
+from user.models import StudentProfile
+
+
+class Command(BaseCommand):
+    help = "Process profile pictures still waiting in pending_picture (after a restart or a crashed worker)."
+
+    def handle(self, *args, **options):
+        ids = list(
+            StudentProfile.all_objects.filter(picture_status=StudentProfile.PICTURE_PENDING)
+            .exclude(pending_picture="")
+            .exclude(pending_picture=None)
+            .values_list("pk", flat=True)
+        )
+        processed = sum(uploads.process_picture(pk) for pk in ids)
+        self.stdout.write(f"Processed {processed} of {len(ids)} pending pictures.")
@@ -0,0 +1,114 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+# Runs in a fresh interpreter so nothing is already imported. The phases
+# follow a worker's boot: django.setup() and the ASGI handler, then the
+# URLconf on first request; user.views is timed separately because urls.py
+# defers it to the first dispatch.
+BOOT_SCRIPT = """
+import json, time
+t0 = time.perf_counter()
+from django.core.asgi import get_asgi_application
+get_asgi_application()
+t1 = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+t2 = time.perf_counter()
+import user.views
+t3 = time.perf_counter()
+print(json.dumps({"setup": t1 - t0, "urls": t2 - t1, "views": t3 - t2}))
+"""
+PHASES = ("setup", "urls", "views")
+
+
+class Command(BaseCommand):
+    help = "Measure worker boot time and break imports down per module and per app (python -X importtime)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="Boots to time without -X importtime.")
+        parser.add_argument("--top", type=int, default=20, help="Modules to list.")
+        parser.add_argument("--json", action="store_true", help="Print the raw numbers as JSON.")
+
+    def handle(self, *args, **options):
+        timings = [self._boot()[0] for _ in range(options["runs"])]
+        phases, stderr = self._boot(importtime=True)
+        modules = parse_importtime(stderr)
+        by_app = group_by_app(modules)
+
+        boot = {
+            phase: statistics.median(t[phase] for t in timings) if timings else phases[phase]
+            for phase in PHASES
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps({
+                "boot_seconds": boot,
+                "apps": by_app,
+                "modules": dict(sorted(modules.items(), key=lambda m: -m[1])[:options["top"]]),
+            }, indent=2))
+            return
+
+        self.stdout.write(f"Boot (median of {options['runs']}, {os.environ.get('DJANGO_SETTINGS_MODULE')}):")
+        for phase in PHASES:
+            self.stdout.write(f"  {phase:<6} {boot[phase] * 1000:8.1f} ms")
+        self.stdout.write(f"  {'worker':<6} {(boot['setup'] + boot['urls']) * 1000:8.1f} ms  (setup + urls)")
+
+        total = sum(modules.values())
+        self.stdout.write(f"\nImport time by app ({len(modules)} modules, {total / 1000:.1f} ms self time):")
+        for app, us in sorted(by_app.items(), key=lambda a: -a[1]):
+            self.stdout.write(f"  {us / 1000:8.1f} ms  {us / total:6.1%}  {app}")
+
+        self.stdout.write(f"\nSlowest {options['top']} modules (self time):")
+        for module, us in sorted(modules.items(), key=lambda m: -m[1])[:options["top"]]:
+            self.stdout.write(f"  {us / 1000:8.1f} ms  {module}")
+
+    def _boot(self, importtime=False):
+        command = [sys.executable]
+        if importtime:
+            command += ["-X", "importtime"]
+        command += ["-c", BOOT_SCRIPT]
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get(
+            "DJANGO_SETTINGS_MODULE", settings.SETTINGS_MODULE
+        )}
+        result = subprocess.run(
+            command, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True
+        )
+        return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def parse_importtime(stderr):
+    # "import time:  self [us] | cumulative | imported package"
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        modules[fields[2].strip()] = int(fields[0])
+    return modules
+
+
+def group_by_app(modules):
+    # Modules belong to the installed app with the longest matching package
+    # name; everything else is grouped by its top-level package.
+    app_names = sorted((config.name for config in apps.get_app_configs()), key=len, reverse=True)
+    totals = defaultdict(int)
+    for module, us in modules.items():
+        owner = next(
+            (name for name in app_names if module == name or module.startswith(name + ".")),
+            None,
+        )
+        if owner is None:
+            top = module.split(".")[0]
+            owner = "django (core)" if top == "django" else top
+        totals[owner] += us
+    return dict(totals)
@@ -0,0 +1,107 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from user import audit
+from user.archive import delete_snapshots, raw_delete
+from user.models import CustomUser, StudentProfile, Course, Enrollment, ReportJob
+
+
+class Command(BaseCommand):
+    help = "Hard-delete soft-deleted students, courses and enrollments in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=0,
+            help="Only purge rows soft-deleted at least this many days ago.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.0,
+            help="Seconds to pause between batches to let other writers in.",
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        self.sleep = options["sleep"]
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+
+        # Children first so every batch only removes rows nothing else points at.
+        self.purge(
+            "enrollments",
+            Enrollment.all_objects.filter(deleted_at__lte=cutoff),
+            self._delete_enrollments,
+        )
+        self.purge(
+            "students",
+            StudentProfile.all_objects.filter(deleted_at__lte=cutoff),
+            self._delete_students,
+        )
+        self.purge(
+            "courses",
+            Course.all_objects.filter(deleted_at__lte=cutoff),
+            self._delete_courses,
+        )
+
+    def purge(self, label, queryset, delete_batch):
+        total = queryset.count()
+        done = 0
+        self.stdout.write(f"Purging {total} {label}...")
+
+        while True:
+            ids = list(queryset.order_by("pk").values_list("pk", flat=True)[:self.batch_size])
+            if not ids:
+                break
+
+            with transaction.atomic(using=router.db_for_write(queryset.model)):
+                delete_batch(ids)
+                audit.bulk_changed()
+
+            done += len(ids)
+            self.stdout.write(f"  {label}: {done}/{total}")
+            if self.sleep:
+                time.sleep(self.sleep)
+
+        self.stdout.write(self.style.SUCCESS(f"Purged {done} {label}."))
+
+    def _delete_enrollments(self, ids):
+        raw_delete(Enrollment.all_objects.filter(pk__in=ids))
+
+    def _delete_students(self, ids):
+        user_ids = list(
+            StudentProfile.all_objects.filter(pk__in=ids).values_list("user_id", flat=True)
+        )
+        # Remove any enrollments still pointing at these profiles before the FK targets go.
+        raw_delete(Enrollment.all_objects.filter(student_id__in=ids))
+        delete_snapshots(ids)
+        raw_delete(ReportJob.all_objects.filter(student_id__in=ids))
+        raw_delete(StudentProfile.all_objects.filter(pk__in=ids))
+
+        raw_delete(CustomUser.groups.through.objects.filter(customuser_id__in=user_ids))
+        raw_delete(CustomUser.user_permissions.through.objects.filter(customuser_id__in=user_ids))
+        self._delete_admin_log(user_ids)
+        ReportJob.all_objects.filter(requested_by_id__in=user_ids).update(requested_by=None)
+        raw_delete(CustomUser.objects.filter(pk__in=user_ids))
+
+    def _delete_admin_log(self, user_ids):
+        # Workers run without django.contrib.admin (APP_ROLE=worker), but the
+        # django_admin_log table and its foreign key to the user remain, so
+        # its rows are removed by table name rather than through LogEntry.
+        connection = connections[router.db_for_write(CustomUser)]
+        if not hasattr(self, "_has_admin_log"):
+            self._has_admin_log = "django_admin_log" in connection.introspection.table_names()
+        if self._has_admin_log and user_ids:
+            placeholders = ", ".join(["%s"] * len(user_ids))
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM django_admin_log WHERE user_id IN ({placeholders})", user_ids)
+
+    def _delete_courses(self, ids):
+        raw_delete(Enrollment.all_objects.filter(course_id__in=ids))
+        raw_delete(Course.all_objects.filter(pk__in=ids))
@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from user import audit
+from user.archive import counted_archive
+from user.models import StudentProfile, Course, Enrollment
+
+
+def _count_subquery(queryset, field, **filters):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')}, **filters)
+            .order_by()
+            .values(field)
+            .annotate(n=Count('pk'))
+            .values('n')
+        ),
+        0,
+    )
+
+
+def _expected(field, **filters):
+    # Archived enrollments count as well; see archive.counted_archive.
+    return (
+        _count_subquery(Enrollment.objects.all(), field, **filters)
+        + _count_subquery(counted_archive(), field, **filters)
+    )
+
+
+class Command(BaseCommand):
+    help = "Recompute enrollment_count/completed_count on students and courses."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted rows without fixing them.",
+        )
+
+    def handle(self, *args, **options):
+        for label, model, field in (
+            ("students", StudentProfile, "student_id"),
+            ("courses", Course, "course_id"),
+        ):
+            fixed = self.reconcile(model, field, options["batch_size"], options["dry_run"])
+            verb = "Found" if options["dry_run"] else "Fixed"
+            self.stdout.write(f"{verb} {fixed} {label} with drifted counters.")
+
+    def reconcile(self, model, field, batch_size, dry_run):
+        drifted = (
+            model.objects
+            .annotate(
+                expected_enrolled=_expected(field),
+                expected_completed=_expected(field, completed=True),
+            )
+            .filter(
+                ~Q(enrollment_count=F('expected_enrolled'))
+                | ~Q(completed_count=F('expected_completed'))
+            )
+            .only('pk', 'enrollment_count', 'completed_count')
+        )
+
+        fixed = 0
+        batch = []
+        for obj in drifted.iterator(chunk_size=batch_size):
+            obj.enrollment_count = obj.expected_enrolled
+            obj.completed_count = obj.expected_completed
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                fixed += self._save(model, batch, dry_run)
+                batch = []
+        if batch:
+            fixed += self._save(model, batch, dry_run)
+        return fixed
+
+    def _save(self, model, batch, dry_run):
+        if not dry_run:
+            model.all_objects.bulk_update(batch, ['enrollment_count', 'completed_count'])
+            audit.bulk_changed()
+        return len(batch)
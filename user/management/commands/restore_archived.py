@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from user import archive
+from user.models import ArchivedEnrollment
+
+
+class Command(BaseCommand):
+    help = "Move archived students or enrollments back into the live tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--student",
+            type=int,
+            action="append",
+            default=[],
+            help="Archived student id (the former profile id), with all of their enrollments. Repeatable.",
+        )
+        parser.add_argument(
+            "--enrollment",
+            type=int,
+            action="append",
+            default=[],
+            help="Archived enrollment id. Repeatable.",
+        )
+        parser.add_argument(
+            "--enrollments-of",
+            type=int,
+            action="append",
+            default=[],
+            help="Every archived enrollment of a student who is still active. Repeatable.",
+        )
+
+    def handle(self, *args, **options):
+        if not (options["student"] or options["enrollment"] or options["enrollments_of"]):
+            raise CommandError("Pass --student, --enrollment or --enrollments-of.")
+
+        if options["student"]:
+            students, restored, skipped = archive.restore_students(options["student"])
+            self.stdout.write(
+                f"Restored {students} students with {restored} enrollments ({skipped} left archived)."
+            )
+
+        ids = options["enrollment"]
+        students = options["enrollments_of"]
+        if ids or students:
+            queryset = ArchivedEnrollment.objects.filter(pk__in=ids) | ArchivedEnrollment.objects.filter(
+                student_id__in=students
+            )
+            restored, skipped = archive.restore_enrollments(queryset)
+            self.stdout.write(f"Restored {restored} enrollments ({skipped} left archived).")
@@ -0,0 +1,26 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from user import reports
+
+
+class Command(BaseCommand):
+    help = "Process pending transcript jobs on a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--poll-interval", type=float, default=2.0)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when there are no pending jobs instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        reports.work(
+            workers=options["workers"],
+            once=options["once"],
+            poll_interval=options["poll_interval"],
+            log=self.stdout.write,
+        )
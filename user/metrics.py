@@ -0,0 +1,261 @@
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def metrics(self):
+        return list(self._metrics.values())
+
+    # Multi-process mode: every gunicorn worker dumps its own samples into
+    # METRICS_MULTIPROC_DIR and /metrics merges all files on scrape. The
+    # directory must be emptied before the master starts, as with
+    # prometheus_client.
+    def multiproc_dir(self):
+        return getattr(settings, "METRICS_MULTIPROC_DIR", None)
+
+    def flush(self, force=False):
+        directory = self.multiproc_dir()
+        if not directory:
+            return
+
+        now = time.monotonic()
+        interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0)
+        if not force and now - self._last_flush < interval:
+            return
+        self._last_flush = now
+
+        data = {name: metric.dump() for name, metric in self._metrics.items()}
+        path = os.path.join(directory, f"metrics_{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as fh:
+            json.dump(data, fh)
+        os.replace(tmp_path, path)
+
+    def retire(self, pid):
+        # Called by gunicorn's child_exit hook in the master. The exited
+        # worker's samples are folded into one file for all exited workers
+        # and its own file is removed, so a new worker that gets the same
+        # pid starts a fresh file instead of overwriting them.
+        directory = self.multiproc_dir()
+        if not directory:
+            return
+        path = os.path.join(directory, f"metrics_{pid}.json")
+        exited_path = os.path.join(directory, "metrics_exited.json")
+        try:
+            with open(path) as fh:
+                samples = json.load(fh)
+        except (OSError, ValueError):
+            return
+        try:
+            with open(exited_path) as fh:
+                exited = json.load(fh)
+        except (OSError, ValueError):
+            exited = {}
+        for name, values in samples.items():
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric.merge(exited.setdefault(name, {}), values)
+        tmp_path = f"{exited_path}.tmp"
+        with open(tmp_path, "w") as fh:
+            json.dump(exited, fh)
+        os.replace(tmp_path, exited_path)
+        os.remove(path)
+
+    def collect(self):
+        directory = self.multiproc_dir()
+        if not directory:
+            return {name: metric.dump() for name, metric in self._metrics.items()}
+
+        self.flush(force=True)
+        merged = {}
+        for filename in os.listdir(directory):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as fh:
+                    data = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            for name, samples in data.items():
+                metric = self._metrics.get(name)
+                if metric is not None:
+                    metric.merge(merged.setdefault(name, {}), samples)
+        return merged
+
+    def exposition(self):
+        collected = self.collect()
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render(collected.get(metric.name, {})))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+atexit.register(REGISTRY.flush, force=True)
+
+
+def _label_key(labelnames, labels):
+    return "\x1f".join(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=None):
+    values = key.split("\x1f") if labelnames else []
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(name, value.replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + body + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dump(self):
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, into, samples):
+        for key, value in samples.items():
+            into[key] = into.get(key, 0) + value
+
+    def render(self, samples):
+        for key, value in sorted(samples.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {float(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        # Buckets are stored non-cumulatively; the last slot is +Inf.
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            sample = self._values.get(key)
+            if sample is None:
+                sample = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            sample[0][index] += 1
+            sample[1] += value
+            sample[2] += 1
+
+    def dump(self):
+        with self._lock:
+            return {key: [list(counts), total, count] for key, (counts, total, count) in self._values.items()}
+
+    def merge(self, into, samples):
+        for key, (counts, total, count) in samples.items():
+            current = into.get(key)
+            if current is None:
+                into[key] = [list(counts), total, count]
+                continue
+            current[0] = [a + b for a, b in zip(current[0], counts)]
+            current[1] += total
+            current[2] += count
+
+    def render(self, samples):
+        bounds = [str(float(b)) for b in self.buckets] + ["+Inf"]
+        for key, (counts, total, count) in sorted(samples.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", bound))
+                yield f"{self.name}_bucket{labels} {float(cumulative)}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {float(total)}"
+            yield f"{self.name}_count{labels} {float(count)}"
+
+
+http_requests = Counter(
+    "http_requests_total",
+    "HTTP requests by view, method and status code.",
+    ("view", "method", "status"),
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling a request, by view.",
+    ("view", "method"),
+)
+db_queries = Histogram(
+    "db_queries_per_request",
+    "Number of database queries executed per request, by view.",
+    ("view",),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds_per_request",
+    "Total time spent in database queries per request, by view.",
+    ("view",),
+)
+cache_lookups = Counter(
+    "cache_lookups_total",
+    "Lookups of the app's cached values, by cache and result (hit or miss).",
+    ("cache", "result"),
+)
+mail_sent = Counter(
+    "mail_sent_total",
+    "Emails sent from model signals.",
+    ("kind",),
+)
+mail_failures = Counter(
+    "mail_failures_total",
+    "Emails from model signals that failed to send.",
+    ("kind",),
+)
+mail_send_duration = Histogram(
+    "mail_send_duration_seconds",
+    "Time spent sending an email from a model signal.",
+    ("kind",),
+)
+
+
+def cache_lookup(cache, hit):
+    cache_lookups.inc(cache=cache, result="hit" if hit else "miss")
@@ -0,0 +1,71 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from . import audit, metrics, tenancy
+
+
+class _QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = _QueryTimer()
+        start = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+
+        elapsed = time.perf_counter() - start
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name or match.view_name) if match else "unresolved"
+
+        metrics.http_requests.inc(view=view, method=request.method, status=response.status_code)
+        metrics.http_request_duration.observe(elapsed, view=view, method=request.method)
+        metrics.db_queries.observe(timer.count, view=view)
+        metrics.db_query_duration.observe(timer.duration, view=view)
+        metrics.REGISTRY.flush()
+
+        return response
+
+
+class AuditMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        def actor_id():
+            user = getattr(request, "user", None)
+            return user.pk if user is not None and user.is_authenticated else None
+
+        with audit.buffer(actor_id):
+            return self.get_response(request)
+
+
+class TenantMiddleware:
+    # Maps the request's host to a tenant and scopes every tenant model's
+    # default manager to it for the rest of the request.
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.tenant_id = tenancy.resolve_host(request.get_host())
+        with tenancy.use(request.tenant_id):
+            return self.get_response(request)
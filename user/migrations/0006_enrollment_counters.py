@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:48
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Enrollment = apps.get_model('user', 'Enrollment')
+
+    def count(field, **filters):
+        return Coalesce(
+            Subquery(
+                Enrollment.objects.filter(
+                    **{field: OuterRef('pk')}, deleted_at__isnull=True, **filters
+                )
+                .order_by()
+                .values(field)
+                .annotate(n=Count('pk'))
+                .values('n')
+            ),
+            0,
+        )
+
+    for model_name, field in (('StudentProfile', 'student'), ('Course', 'course')):
+        apps.get_model('user', model_name).objects.update(
+            enrollment_count=count(field),
+            completed_count=count(field, completed=True),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0005_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='completed_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='enrollment_count',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='completed_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='enrollment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:49
+
+from datetime import date
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+def _next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def create_audit_table(apps, schema_editor):
+    AuditLog = apps.get_model('user', 'AuditLog')
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.create_model(AuditLog)
+        return
+
+    # Partitioned tables need the partition key in the primary key. Django
+    # keeps treating id as the primary key, which the identity column makes
+    # unique in practice.
+    schema_editor.execute("""
+        CREATE TABLE user_auditlog (
+            id bigint GENERATED BY DEFAULT AS IDENTITY,
+            created_at timestamp with time zone NOT NULL,
+            actor_id bigint NULL,
+            model varchar(32) NOT NULL,
+            object_id bigint NOT NULL,
+            action varchar(1) NOT NULL,
+            changes jsonb NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    schema_editor.execute("CREATE TABLE user_auditlog_default PARTITION OF user_auditlog DEFAULT")
+    # This month's and next month's partitions exist before the first row is
+    # written; once rows for a month sit in the default partition, that
+    # month can no longer be attached. audit_partitions adds the later ones.
+    first = date.today().replace(day=1)
+    for start, end in ((first, _next_month(first)), (_next_month(first), _next_month(_next_month(first)))):
+        schema_editor.execute(
+            f"CREATE TABLE user_auditlog_y{start.year}m{start.month:02d} PARTITION OF user_auditlog "
+            "FOR VALUES FROM (%s) TO (%s)",
+            [start.isoformat(), end.isoformat()],
+        )
+    schema_editor.execute("CREATE INDEX auditlog_created_idx ON user_auditlog (created_at)")
+    schema_editor.execute(
+        "CREATE INDEX auditlog_object_idx ON user_auditlog (model, object_id, created_at)"
+    )
+
+
+def drop_audit_table(apps, schema_editor):
+    schema_editor.delete_model(apps.get_model('user', 'AuditLog'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0006_enrollment_counters'),
+    ]
+
+    operations = [
+        # The table itself is created by create_audit_table so PostgreSQL can
+        # get a partitioned one.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='AuditLog',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('created_at', models.DateTimeField()),
+                        ('actor_id', models.BigIntegerField(blank=True, null=True)),
+                        ('model', models.CharField(max_length=32)),
+                        ('object_id', models.BigIntegerField()),
+                        ('action', models.CharField(choices=[('c', 'Create'), ('u', 'Update'), ('d', 'Delete')], max_length=1)),
+                        ('changes', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                    ],
+                    options={
+                        'indexes': [models.Index(fields=['created_at'], name='auditlog_created_idx'), models.Index(fields=['model', 'object_id', 'created_at'], name='auditlog_object_idx')],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_audit_table, drop_audit_table),
+    ]
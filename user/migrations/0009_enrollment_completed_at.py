@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0008_report_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,130 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:11
+
+import re
+
+import django.db.models.deletion
+import user.models
+import user.tenancy
+from django.db import migrations, models
+
+
+TENANT_MODELS = ('customuser', 'studentprofile', 'course', 'enrollment', 'reportjob')
+
+
+def tenant_field(null=False):
+    return models.ForeignKey(
+        db_index=False,
+        default=user.tenancy.current_tenant_id,
+        null=null,
+        on_delete=django.db.models.deletion.PROTECT,
+        related_name='+',
+        to='user.tenant',
+    )
+
+
+def create_default_tenant(apps, schema_editor):
+    # Existing rows all belong to one institution. Its roll sequence carries
+    # on from the highest roll number already handed out.
+    Tenant = apps.get_model('user', 'Tenant')
+    StudentProfile = apps.get_model('user', 'StudentProfile')
+    AuditLog = apps.get_model('user', 'AuditLog')
+
+    numbers = [
+        int(match.group(1))
+        for roll in StudentProfile.objects.exclude(roll_number=None).values_list('roll_number', flat=True).iterator()
+        if (match := re.fullmatch(r'S(\d+)', roll))
+    ]
+    tenant = Tenant.objects.create(name='Default', slug='default', roll_sequence=max(numbers, default=0))
+
+    for name in TENANT_MODELS:
+        apps.get_model('user', name).objects.update(tenant=tenant)
+    AuditLog.objects.update(tenant_id=tenant.pk)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('user', '0010_live_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tenant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(unique=True)),
+                ('domain', models.CharField(blank=True, max_length=255, null=True, unique=True)),
+                ('roll_sequence', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='customuser',
+            managers=[
+                ('objects', user.models.TenantUserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='tenant_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        # Added nullable, backfilled, then made required.
+        *[
+            migrations.AddField(model_name=name, name='tenant', field=tenant_field(null=True))
+            for name in TENANT_MODELS
+        ],
+        migrations.RunPython(create_default_tenant, migrations.RunPython.noop),
+        *[
+            migrations.AlterField(model_name=name, name='tenant', field=tenant_field())
+            for name in TENANT_MODELS
+        ],
+        # Every lookup now starts with the tenant, so the indexes do too.
+        migrations.RemoveConstraint(
+            model_name='course',
+            name='unique_active_course_title',
+        ),
+        migrations.RemoveConstraint(
+            model_name='enrollment',
+            name='unique_active_enrollment',
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='enrollment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['tenant_id', 'created_at'], name='auditlog_tenant_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['tenant', '-enrollment_count'], name='course_tenant_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['tenant', 'role'], name='user_tenant_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['tenant', '-id'], name='enroll_tenant_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['tenant', 'roll_number'], name='student_tenant_roll_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['tenant', 'department'], name='student_tenant_dept_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='course',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('tenant', 'title'), name='unique_active_course_title'),
+        ),
+        migrations.AddConstraint(
+            model_name='enrollment',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('tenant', 'student', 'course'), name='unique_active_enrollment'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:17
+
+import django.db.models.deletion
+import user.tenancy
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0011_tenants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedEnrollment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('student_id', models.BigIntegerField()),
+                ('course_id', models.BigIntegerField()),
+                ('course_title', models.CharField(max_length=200)),
+                ('progress', models.IntegerField(default=0)),
+                ('completed', models.BooleanField(default=False)),
+                ('enrolled_at', models.DateTimeField()),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('tenant', models.ForeignKey(db_index=False, default=user.tenancy.current_tenant_id, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='user.tenant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tenant', 'student_id', 'enrolled_at'], name='archenroll_tenant_student_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedStudent',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('roll_number', models.CharField(blank=True, max_length=20, null=True)),
+                ('department', models.CharField(blank=True, max_length=100, null=True)),
+                ('year_of_admission', models.IntegerField(blank=True, null=True)),
+                ('profile_picture', models.ImageField(blank=True, null=True, upload_to='profiles/')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('tenant', models.ForeignKey(db_index=False, default=user.tenancy.current_tenant_id, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='user.tenant')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archived_profile', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tenant', 'roll_number'], name='archstudent_tenant_roll_idx')],
+            },
+        ),
+    ]
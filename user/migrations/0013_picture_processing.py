@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0012_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentprofile',
+            name='pending_picture',
+            field=models.FileField(blank=True, null=True, upload_to='uploads/pending/'),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='picture_error',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='picture_status',
+            field=models.CharField(blank=True, choices=[('', 'Ready'), ('pending', 'Processing'), ('failed', 'Rejected')], default='', max_length=10),
+        ),
+    ]
@@ -1,40 +1,247 @@
-from django.db import models
-from django.contrib.auth.models import AbstractUser
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.db.models import Count, F, Q
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from . import audit, live, permissions, tenancy
+from .tenancy import TenantScopedMixin
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def soft_delete(self):
+        return self.update(deleted_at=timezone.now())
+
+
+class TenantManager(TenantScopedMixin, models.Manager.from_queryset(SoftDeleteQuerySet)):
+    pass
+
+
+class ActiveManager(TenantManager):
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class TenantUserManager(TenantScopedMixin, UserManager):
+    pass
+
+
+class TenantMixin(models.Model):
+    # Filled from the current request's tenant, or the default tenant outside
+    # requests. Every composite index on these models starts with tenant, so
+    # the foreign key needs no index of its own.
+    tenant = models.ForeignKey(
+        'Tenant',
+        on_delete=models.PROTECT,
+        default=tenancy.current_tenant_id,
+        related_name='+',
+        db_index=False,
+    )
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self.tenant_id is None:
+            self.tenant_id = tenancy.active_tenant_id()
+        super().save(*args, **kwargs)
+
+
+class AuditMixin(models.Model):
+    # Fields whose changes are not worth an audit row.
+    audit_exclude = ()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._audit_snapshot = instance._audit_values(field_names)
+        return instance
+
+    def _audit_values(self, attnames=None):
+        values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in self.audit_exclude:
+                continue
+            if attnames is not None and field.attname not in attnames:
+                continue
+            values[field.attname] = audit.audit_value(getattr(self, field.attname))
+        return values
+
+    def save(self, *args, **kwargs):
+        created = self._state.adding
+        before = getattr(self, '_audit_snapshot', {})
+        super().save(*args, **kwargs)
+
+        after = self._audit_values(None if created else before.keys())
+        if created:
+            audit.record(self, audit.CREATE, {
+                k: [None, v] for k, v in after.items() if v is not None and k != 'id'
+            })
+        else:
+            changes = {k: [before[k], v] for k, v in after.items() if before[k] != v}
+            if changes:
+                audit.record(self, audit.UPDATE, changes)
+        self._audit_snapshot = after
+
+    def delete(self, *args, **kwargs):
+        audit.record(self, audit.DELETE, {})
+        return super().delete(*args, **kwargs)
+
 
-class CustomUser(AbstractUser):
+class Tenant(models.Model):
+    # One institution. Requests are mapped to a tenant by host name; see
+    # tenancy.resolve_host and TenantMiddleware.
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(unique=True)
+    domain = models.CharField(max_length=255, unique=True, blank=True, null=True)
+    # Last roll number handed out; see generate_roll_number().
+    roll_sequence = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class CustomUser(TenantMixin, AbstractUser):
     ROLE_CHOICES = (
         ('admin', 'Admin'),
         ('student', 'Student'),
     )
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='student')
+    # Usernames stay globally unique; a user can only sign in on their
+    # tenant's host because the manager is scoped.
+    objects = TenantUserManager()
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['tenant', 'role'], name='user_tenant_role_idx'),
+        ]
 
     def __str__(self):
         return self.username
 
 
-class StudentProfile(models.Model):
+class StudentProfile(TenantMixin, AuditMixin, models.Model):
+    PICTURE_PENDING = 'pending'
+    PICTURE_FAILED = 'failed'
+    PICTURE_STATUS_CHOICES = (
+        ('', 'Ready'),
+        (PICTURE_PENDING, 'Processing'),
+        (PICTURE_FAILED, 'Rejected'),
+    )
+
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     roll_number = models.CharField(max_length=20, blank=True, null=True)
     department = models.CharField(max_length=100, blank=True, null=True)
     year_of_admission = models.IntegerField(blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profiles/', blank=True, null=True)
+    # A new upload waits here until uploads.process_picture has checked and
+    # resized it into profile_picture.
+    pending_picture = models.FileField(upload_to='uploads/pending/', blank=True, null=True)
+    picture_status = models.CharField(max_length=10, choices=PICTURE_STATUS_CHOICES, blank=True, default='')
+    picture_error = models.CharField(max_length=200, blank=True, default='')
+    deleted_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
+    # Maintained by update_enrollment_counters(); rebuild with reconcile_counters.
+    enrollment_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+
+    objects = ActiveManager()
+    all_objects = TenantManager()
+
+    audit_exclude = ('enrollment_count', 'completed_count', 'pending_picture', 'picture_status', 'picture_error')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'roll_number'], name='student_tenant_roll_idx'),
+            models.Index(fields=['tenant', 'department'], name='student_tenant_dept_idx'),
+        ]
 
     def __str__(self):
      return self.user.get_full_name() or self.user.username
 
+    @transaction.atomic
+    def soft_delete(self):
+        # Hide the student immediately; purge_deleted removes the rows later.
+        now = timezone.now()
+        enrollments = Enrollment.objects.filter(student=self)
+        # A student has at most one active enrollment per course.
+        bump_counters(Course.all_objects.filter(pk__in=enrollments.values('course_id')), enrolled=-1)
+        bump_counters(
+            Course.all_objects.filter(pk__in=enrollments.filter(completed=True).values('course_id')),
+            completed=-1,
+        )
+        uncount_archived(ArchivedEnrollment.objects.filter(student_id=self.pk), Course, 'course_id')
+        CustomUser.objects.filter(pk=self.user_id).update(is_active=False)
+        removed = enrollments.update(deleted_at=now)
+        live.publish('counts', tenant=self.tenant_id, deltas={'student_count': -1, 'enrollment_count': -removed})
+        StudentProfile.all_objects.filter(pk=self.pk).update(deleted_at=now)
+        audit.record(self, audit.UPDATE, {'deleted_at': [None, now]})
+        self.deleted_at = now
+        permissions.invalidate(self.user_id)
+
     
-class Course(models.Model):
-    title = models.CharField(max_length=200, unique=True)
+class Course(TenantMixin, AuditMixin, models.Model):
+    title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
+    enrollment_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+
+    objects = ActiveManager()
+    all_objects = TenantManager()
+
+    audit_exclude = ('enrollment_count', 'completed_count', 'updated_at')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant', 'title'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='unique_active_course_title',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['tenant', '-enrollment_count'], name='course_tenant_popular_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @property
+    def completion_rate(self):
+        if not self.enrollment_count:
+            return 0
+        return round(self.completed_count * 100 / self.enrollment_count)
+
+    @transaction.atomic
+    def soft_delete(self):
+        now = timezone.now()
+        enrollments = Enrollment.objects.filter(course=self)
+        bump_counters(StudentProfile.all_objects.filter(pk__in=enrollments.values('student_id')), enrolled=-1)
+        bump_counters(
+            StudentProfile.all_objects.filter(pk__in=enrollments.filter(completed=True).values('student_id')),
+            completed=-1,
+        )
+        uncount_archived(ArchivedEnrollment.objects.filter(course_id=self.pk), StudentProfile, 'student_id')
+        removed = enrollments.update(deleted_at=now)
+        # updated_at moves too so cached catalog pages drop the course.
+        Course.all_objects.filter(pk=self.pk).update(deleted_at=now, updated_at=now)
+        live.publish('counts', tenant=self.tenant_id, deltas={'course_count': -1, 'enrollment_count': -removed})
+        audit.record(self, audit.UPDATE, {'deleted_at': [None, now]})
+        self.deleted_at = now
 
-class Enrollment(models.Model):
+
+class Enrollment(TenantMixin, AuditMixin, models.Model):
     student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name="enrollments")
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="enrollments")
 
@@ -42,18 +249,208 @@ class Enrollment(models.Model):
     completed = models.BooleanField(default=False)
 
     enrolled_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    deleted_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
+    objects = ActiveManager()
+    all_objects = TenantManager()
 
     class Meta:
-        unique_together = ('student', 'course')
+        constraints = [
+            # tenant is redundant with student, but a unique index on a
+            # partitioned table has to include the partition key.
+            models.UniqueConstraint(
+                fields=['tenant', 'student', 'course'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='unique_active_enrollment',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['tenant', '-id'], name='enroll_tenant_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student.user.username} → {self.course.title}"
 
+    def save(self, *args, **kwargs):
+        # Always the student's tenant; it is the partition key when the table
+        # is partitioned (enrollment_partitions).
+        if self._state.adding and self.student_id:
+            self.tenant_id = self.student.tenant_id
+        super().save(*args, **kwargs)
+
+
+class AuditLog(models.Model):
+    ACTION_CHOICES = (
+        (audit.CREATE, 'Create'),
+        (audit.UPDATE, 'Update'),
+        (audit.DELETE, 'Delete'),
+    )
+
+    # Append-only. On PostgreSQL the table is range-partitioned by month on
+    # created_at (see migration 0007 and the audit_partitions command), so
+    # there are no foreign keys and the primary key is (id, created_at).
+    created_at = models.DateTimeField()
+    actor_id = models.BigIntegerField(blank=True, null=True)
+    model = models.CharField(max_length=32)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=1, choices=ACTION_CHOICES)
+    changes = models.JSONField(encoder=DjangoJSONEncoder)
+    tenant_id = models.BigIntegerField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='auditlog_created_idx'),
+            models.Index(fields=['tenant_id', 'created_at'], name='auditlog_tenant_created_idx'),
+            models.Index(fields=['model', 'object_id', 'created_at'], name='auditlog_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.model}#{self.object_id}"
+
+
+class ReportJob(TenantMixin, models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    # Either one student or a whole department.
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, blank=True, null=True, related_name="report_jobs")
+    department = models.CharField(max_length=100, blank=True, null=True)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    total = models.PositiveIntegerField(default=0)
+    done = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    objects = TenantManager()
+    # The report worker claims jobs from every tenant's queue.
+    all_objects = models.Manager()
+
+    def __str__(self):
+        target = self.student or self.department
+        return f"Transcripts for {target} ({self.status})"
+
+
+class LiveEvent(models.Model):
+    # Short-lived relay table for live.DatabaseBroker.
+    created_at = models.DateTimeField(auto_now_add=True)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+
+
+class TranscriptSnapshot(models.Model):
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name="transcripts")
+    # Digest of everything the transcript shows; see reports.transcript_version.
+    version = models.CharField(max_length=40)
+    file = models.FileField(upload_to='transcripts/')
+    generated_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'version'], name='unique_transcript_version'),
+        ]
+
+    def __str__(self):
+        return f"Transcript {self.student_id} @ {self.version[:8]}"
+
+
+class ArchivedStudent(TenantMixin, models.Model):
+    # A graduated StudentProfile moved out of the hot table by the archive
+    # command; the id is the profile's, so transcripts and restores keep it.
+    id = models.BigIntegerField(primary_key=True)
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_profile')
+    roll_number = models.CharField(max_length=20, blank=True, null=True)
+    department = models.CharField(max_length=100, blank=True, null=True)
+    year_of_admission = models.IntegerField(blank=True, null=True)
+    profile_picture = models.ImageField(upload_to='profiles/', blank=True, null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TenantManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'roll_number'], name='archstudent_tenant_roll_idx'),
+        ]
+
+    def __str__(self):
+        return self.user.get_full_name() or self.user.username
+
+
+class ArchivedEnrollment(TenantMixin, models.Model):
+    # A completed enrollment moved out of the hot table. No foreign keys:
+    # the student may be archived too and the course may be purged later, so
+    # the title is kept for transcripts.
+    id = models.BigIntegerField(primary_key=True)
+    student_id = models.BigIntegerField()
+    course_id = models.BigIntegerField()
+    course_title = models.CharField(max_length=200)
+
+    progress = models.IntegerField(default=0)
+    completed = models.BooleanField(default=False)
+
+    enrolled_at = models.DateTimeField()
+    completed_at = models.DateTimeField(blank=True, null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TenantManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'student_id', 'enrolled_at'], name='archenroll_tenant_student_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} → {self.course_title} (archived)"
+
+
+def bump_counters(queryset, enrolled=0, completed=0):
+    # Single UPDATE ... SET x = x + n, so concurrent requests never overwrite
+    # each other's changes.
+    changes = {}
+    if enrolled:
+        changes['enrollment_count'] = F('enrollment_count') + enrolled
+    if completed:
+        changes['completed_count'] = F('completed_count') + completed
+    if changes:
+        queryset.update(**changes)
+
+
+def uncount_archived(archived, model, field):
+    # Archived enrollments stay in the counters of live students and courses
+    # (archive.counted_archive). When one side is soft-deleted they leave the
+    # other side's counters; one UPDATE per distinct (enrolled, completed)
+    # delta instead of one per row.
+    groups = defaultdict(list)
+    totals = archived.order_by().values(field).annotate(n=Count('pk'), done=Count('pk', filter=Q(completed=True)))
+    for row in totals:
+        groups[row['n'], row['done']].append(row[field])
+    for (n, done), pks in groups.items():
+        bump_counters(model.objects.filter(pk__in=pks), enrolled=-n, completed=-done)
+
+
+def update_enrollment_counters(enrollment, enrolled=0, completed=0):
+    bump_counters(StudentProfile.all_objects.filter(pk=enrollment.student_id), enrolled, completed)
+    bump_counters(Course.all_objects.filter(pk=enrollment.course_id), enrolled, completed)
+
 
-def generate_roll_number():
-    last_profile = StudentProfile.objects.order_by('-id').first()
-    if not last_profile or not last_profile.roll_number:
-        return "S0001"
-    last_num = int(last_profile.roll_number.replace("S", ""))
-    new_num = last_num + 1
-    return f"S{new_num:04d}"
+def generate_roll_number(tenant_id=None):
+    # Each tenant numbers its students from S0001. The UPDATE locks the
+    # tenant row until the transaction ends, so concurrent calls never read
+    # the same value.
+    tenant_id = tenant_id or tenancy.active_tenant_id()
+    with transaction.atomic():
+        Tenant.objects.filter(pk=tenant_id).update(roll_sequence=F('roll_sequence') + 1)
+        number = Tenant.objects.filter(pk=tenant_id).values_list('roll_sequence', flat=True).get()
+    return f"S{number:04d}"
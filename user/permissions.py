@@ -0,0 +1,143 @@
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from . import metrics
+
+
+# Capabilities checked by views beyond the plain admin/student split; see
+# decorators.capability_required and Capabilities.owns for object checks.
+ADMIN_CAPABILITIES = frozenset({
+    "export_audit_log",
+    "view_all_transcripts",
+})
+STUDENT_CAPABILITIES = frozenset({
+    "complete_own_enrollment",
+})
+
+CACHE_TIMEOUT = 60 * 15
+
+
+class Capabilities:
+    # A graduate is a student whose profile was archived (archive_students):
+    # not a student any more, but profile_id is the archived profile's, so
+    # their own transcript stays theirs.
+    def __init__(self, user_id=None, is_admin=False, is_student=False, profile_id=None, graduated=False):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.is_student = is_student
+        self.profile_id = profile_id
+        self.graduated = graduated
+
+        capabilities = frozenset()
+        if is_admin:
+            capabilities |= ADMIN_CAPABILITIES
+        if is_student:
+            capabilities |= STUDENT_CAPABILITIES
+        self.capabilities = capabilities
+
+    @property
+    def is_authenticated(self):
+        return self.user_id is not None
+
+    def can(self, capability):
+        return capability in self.capabilities
+
+    def owns(self, obj):
+        # Compares foreign key ids only, so no related rows are loaded.
+        from .models import StudentProfile, Enrollment, ReportJob
+
+        if isinstance(obj, StudentProfile):
+            return self.owns_profile(obj.pk)
+        if isinstance(obj, (Enrollment, ReportJob)):
+            return self.owns_profile(obj.student_id)
+        return False
+
+    def owns_profile(self, profile_id):
+        return self.profile_id is not None and profile_id == self.profile_id
+
+    def as_dict(self):
+        return {
+            "user_id": self.user_id,
+            "is_admin": self.is_admin,
+            "is_student": self.is_student,
+            "profile_id": self.profile_id,
+            "graduated": self.graduated,
+        }
+
+
+ANONYMOUS = Capabilities()
+
+
+def cache_key(user_id):
+    return f"user:capabilities:{user_id}"
+
+
+def _fingerprint(user):
+    # Part of the cached value, so a role or staff change is picked up on the
+    # next request in every worker even if a cache delete was missed.
+    return [getattr(user, "role", None), user.is_staff, user.is_superuser]
+
+
+def _compute(user):
+    from .models import ArchivedStudent, StudentProfile
+
+    is_student = getattr(user, "role", None) == "student"
+    profile_id = None
+    graduated = False
+    if is_student:
+        profile_id = (
+            StudentProfile.objects.filter(user_id=user.pk).values_list("pk", flat=True).first()
+        )
+        if profile_id is None:
+            profile_id = (
+                ArchivedStudent.objects.filter(user_id=user.pk).values_list("pk", flat=True).first()
+            )
+            graduated = profile_id is not None
+    return Capabilities(
+        user_id=user.pk,
+        is_admin=getattr(user, "role", None) == "admin" or user.is_staff or user.is_superuser,
+        is_student=is_student and not graduated,
+        profile_id=profile_id,
+        graduated=graduated,
+    )
+
+
+def resolve(user):
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS
+
+    key = cache_key(user.pk)
+    cached = cache.get(key)
+    hit = cached is not None and cached["fingerprint"] == _fingerprint(user)
+    metrics.cache_lookup("capabilities", hit)
+    if hit:
+        return Capabilities(**cached["capabilities"])
+
+    capabilities = _compute(user)
+    # A student without a profile yet is not cached; the profile is created lazily.
+    if not capabilities.is_student or capabilities.profile_id is not None:
+        cache.set(
+            key,
+            {"fingerprint": _fingerprint(user), "capabilities": capabilities.as_dict()},
+            CACHE_TIMEOUT,
+        )
+    return capabilities
+
+
+def get_capabilities(request):
+    # Memoized per request; the request.user a view sees cannot change except
+    # through login()/logout(), which is checked below.
+    user = getattr(request, "user", None)
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    cached = getattr(request, "_capabilities", None)
+    if cached is None or cached.user_id != user_id:
+        cached = request._capabilities = resolve(user)
+    return cached
+
+
+def invalidate(user_id):
+    cache.delete(cache_key(user_id))
+
+
+def capabilities(request):
+    return {"caps": SimpleLazyObject(lambda: get_capabilities(request))}
@@ -0,0 +1,112 @@
+from django.db.models import F
+from django.db.models.functions import Substr
+
+from .models import ArchivedEnrollment, Course, Enrollment, StudentProfile
+
+
+# Named read projections for the pages in views.py: each one selects only
+# the columns its template shows. Pages whose templates call model methods
+# (get_full_name, completion_rate, profile_picture.url) or that save the row
+# get instances narrowed with only(); the others get values() dicts.
+# ModelForm views (create/edit) keep full instances because the form reads
+# and saves every field. bench_projections measures what each one saves.
+
+# Comfortably more than the 15-25 words the templates show. The rest is cut
+# in SQL, so full descriptions never leave the database on list pages.
+PREVIEW_CHARS = 300
+
+# Only the user columns a student row displays; never the password hash.
+USER_FIELDS = ('user__username', 'user__first_name', 'user__last_name', 'user__email')
+
+
+def preview(field, chars=PREVIEW_CHARS):
+    # A plain SUBSTR: a CASE adding an ellipsis cost more to compile than it
+    # saved. truncatewords in the templates cuts the preview to whole words
+    # and adds the ellipsis.
+    return Substr(field, 1, chars)
+
+
+# admin_dashboard
+
+def recent_students(limit=6):
+    return (
+        StudentProfile.objects.select_related('user')
+        .only('id', 'roll_number', 'department', *USER_FIELDS)
+        .order_by('-id')[:limit]
+    )
+
+
+# student_list, student_detail, student_delete
+
+def student_rows():
+    return (
+        StudentProfile.objects.select_related('user').filter(user__role='student')
+        .only('id', 'roll_number', 'department', 'enrollment_count', 'completed_count', *USER_FIELDS)
+    )
+
+
+def student_card():
+    # The same columns plus what the detail page shows; soft_delete also
+    # needs user_id and tenant_id, which only() always loads with the user.
+    return (
+        StudentProfile.objects.select_related('user')
+        .only('id', 'tenant_id', 'roll_number', 'department', 'year_of_admission', 'profile_picture', *USER_FIELDS)
+    )
+
+
+# student_dashboard
+
+def dashboard_enrollments(profile_id):
+    return (
+        Enrollment.objects.filter(student_id=profile_id)
+        .order_by('pk')
+        .values('id', 'progress', 'completed', course_title=F('course__title'), course_preview=preview('course__description'))
+    )
+
+
+def archived_dashboard_enrollments(profile_id):
+    # A graduate's dashboard: archived rows keep only the course title.
+    return (
+        ArchivedEnrollment.objects.filter(student_id=profile_id)
+        .order_by('enrolled_at', 'pk')
+        .values('id', 'progress', 'completed', 'course_title')
+    )
+
+
+# course_list, course_catalog, course_self_enroll, course_delete
+
+def course_rows():
+    return (
+        Course.objects.only('id', 'title', 'enrollment_count', 'completed_count')
+        .annotate(description_preview=preview('description'))
+    )
+
+
+def catalog_rows():
+    return Course.objects.values('id', 'title', description_preview=preview('description'))
+
+
+def course_title():
+    # For pages that act on a course and only name it in messages.
+    return Course.objects.only('id', 'tenant_id', 'title')
+
+
+# enrollment_list, enrollment_delete, mark_course_complete
+
+def enrollment_rows():
+    return (
+        Enrollment.objects.order_by('-id')
+        .values('id', 'completed', username=F('student__user__username'), course_title=F('course__title'))
+    )
+
+
+def enrollment_card():
+    # Everything the enrollment signals and audit entries read when the
+    # row is deleted or completed, plus the names the pages show.
+    return (
+        Enrollment.objects.select_related('student__user', 'course')
+        .only(
+            'id', 'tenant_id', 'student_id', 'course_id', 'progress', 'completed', 'deleted_at',
+            'student__id', 'student__user__id', 'student__user__username', 'course__id', 'course__title',
+        )
+    )
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from itertools import chain, repeat
+from multiprocessing import get_context
+
+from django.core.files.base import ContentFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connections
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from . import tenancy
+from .models import ArchivedEnrollment, ArchivedStudent, StudentProfile, Enrollment, ReportJob, TranscriptSnapshot
+
+
+def transcript_rows(profile_id):
+    # Hot and archived enrollments merged in enrollment order, so archiving
+    # never changes a transcript (or its version).
+    hot = Enrollment.objects.filter(student_id=profile_id).values_list(
+        'enrolled_at', 'pk', 'course__title', 'progress', 'completed'
+    )
+    archived = ArchivedEnrollment.objects.filter(student_id=profile_id).values_list(
+        'enrolled_at', 'pk', 'course_title', 'progress', 'completed'
+    )
+    return [
+        (title, progress, completed, enrolled_at)
+        for enrolled_at, _, title, progress, completed in sorted(chain(hot, archived))
+    ]
+
+
+def transcript_version(profile, rows):
+    # Anything rendered on the transcript is part of the digest, so an
+    # unchanged transcript maps to the same snapshot and is never re-rendered.
+    payload = json.dumps(
+        [
+            profile.user.get_full_name() or profile.user.username,
+            profile.roll_number,
+            profile.department,
+            profile.year_of_admission,
+            rows,
+        ],
+        cls=DjangoJSONEncoder,
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def current_snapshot(profile):
+    rows = transcript_rows(profile.pk)
+    version = transcript_version(profile, rows)
+    snapshot = TranscriptSnapshot.objects.filter(student=profile, version=version).first()
+    return snapshot, version, rows
+
+
+def transcript_html(profile, rows):
+    return render_to_string('reports/transcript.html', {
+        'profile': profile,
+        'enrollments': [
+            {'title': title, 'progress': progress, 'completed': completed, 'enrolled_at': enrolled_at}
+            for title, progress, completed, enrolled_at in rows
+        ],
+        'generated_at': timezone.now(),
+    })
+
+
+def archived_transcript(profile_id):
+    # Graduated students have no snapshots; their transcript never changes,
+    # so it is rendered straight from the archive when asked for.
+    student = ArchivedStudent.objects.select_related('user').filter(pk=profile_id).first()
+    if student is None:
+        return None
+    return transcript_html(student, transcript_rows(profile_id))
+
+
+def render_transcript(profile_id):
+    profile = StudentProfile.objects.select_related('user').get(pk=profile_id)
+    snapshot, version, rows = current_snapshot(profile)
+    if snapshot is not None:
+        return False
+
+    html = transcript_html(profile, rows)
+    snapshot = TranscriptSnapshot(student=profile, version=version)
+    snapshot.file.save(
+        f"{profile.roll_number or profile.pk}-{version[:12]}.html",
+        ContentFile(html.encode()),
+        save=False,
+    )
+    try:
+        snapshot.save()
+    except IntegrityError:
+        # Another worker rendered the same version first.
+        snapshot.file.delete(save=False)
+        return False
+
+    for old in TranscriptSnapshot.objects.filter(student=profile).exclude(pk=snapshot.pk):
+        old.file.delete(save=False)
+        old.delete()
+    return True
+
+
+def _render_one(profile_id, tenant_id=None):
+    # Pool workers are reused across jobs, so the tenant travels with each task.
+    try:
+        with tenancy.use(tenant_id):
+            return profile_id, render_transcript(profile_id), None
+    except Exception as exc:
+        return profile_id, False, f"{profile_id}: {exc}"
+
+
+def job_student_ids(job):
+    if job.student_id:
+        return [job.student_id]
+    return list(
+        StudentProfile.objects.filter(department=job.department, user__role='student')
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+
+
+# A RUNNING job not finished after this long lost its worker (crash,
+# restart) and is handed out again. Rendering is idempotent per version.
+STALE_AFTER = timedelta(hours=1)
+
+
+def requeue_stale_jobs():
+    return ReportJob.all_objects.filter(
+        status=ReportJob.RUNNING, started_at__lt=timezone.now() - STALE_AFTER
+    ).update(status=ReportJob.PENDING, started_at=None, done=0)
+
+
+def claim_next_job():
+    requeue_stale_jobs()
+    for job in ReportJob.all_objects.filter(status=ReportJob.PENDING).order_by('pk')[:10]:
+        # The conditional UPDATE makes claiming safe with several workers.
+        claimed = ReportJob.all_objects.filter(pk=job.pk, status=ReportJob.PENDING).update(
+            status=ReportJob.RUNNING, started_at=timezone.now()
+        )
+        if claimed:
+            job.status = ReportJob.RUNNING
+            return job
+    return None
+
+
+def run_job(job, pool=None, progress_every=25):
+    # Errors in single transcripts are collected by _render_one; anything
+    # else still finishes the job, so its status page stops polling.
+    try:
+        return _run_job(job, pool, progress_every)
+    except Exception as exc:
+        ReportJob.all_objects.filter(pk=job.pk).update(
+            status=ReportJob.FAILED, error=f"{type(exc).__name__}: {exc}", finished_at=timezone.now()
+        )
+        raise
+
+
+def _run_job(job, pool, progress_every):
+    with tenancy.use(job.tenant_id):
+        ids = job_student_ids(job)
+    ReportJob.all_objects.filter(pk=job.pk).update(total=len(ids))
+
+    if pool is not None:
+        # Workers are forked on first use and must not inherit the parent's
+        # open database connections; both sides reconnect lazily.
+        connections.close_all()
+        results = pool.map(_render_one, ids, repeat(job.tenant_id), chunksize=8)
+    else:
+        results = map(_render_one, ids, repeat(job.tenant_id))
+    done = 0
+    errors = []
+    for _, _, error in results:
+        done += 1
+        if error:
+            errors.append(error)
+        if done % progress_every == 0:
+            ReportJob.all_objects.filter(pk=job.pk).update(done=done)
+
+    ReportJob.all_objects.filter(pk=job.pk).update(
+        done=done,
+        status=ReportJob.FAILED if errors else ReportJob.DONE,
+        error="\n".join(errors),
+        finished_at=timezone.now(),
+    )
+    return done, errors
+
+
+def make_pool(workers):
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=get_context('fork'))
+
+
+def work(workers=1, once=False, poll_interval=2.0, log=print):
+    pool = make_pool(workers)
+    try:
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if once:
+                    return
+                time.sleep(poll_interval)
+                continue
+
+            log(f"Job {job.pk}: started")
+            try:
+                done, errors = run_job(job, pool)
+            except BrokenProcessPool as exc:
+                log(f"Job {job.pk}: failed, restarting the pool: {exc}")
+                pool.shutdown()
+                pool = make_pool(workers)
+                continue
+            except Exception as exc:
+                log(f"Job {job.pk}: failed: {exc}")
+                continue
+            log(f"Job {job.pk}: {done} transcripts, {len(errors)} errors")
+    finally:
+        if pool is not None:
+            pool.shutdown()
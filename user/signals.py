@@ -1,8 +1,36 @@
-from django.db.models.signals import post_save
+import time
+
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router
 from django.core.mail import send_mail
-from .models import CustomUser, StudentProfile, Enrollment
+from .models import (
+    CustomUser, StudentProfile, Course, Enrollment, Tenant,
+    generate_roll_number, update_enrollment_counters,
+)
+from . import live, metrics, permissions, tenancy
+
+
+def send_signal_mail(kind, subject, message, recipient):
+    start = time.perf_counter()
+    try:
+        send_mail(
+            subject,
+            message,
+            settings.DEFAULT_FROM_EMAIL,
+            [recipient],
+            fail_silently=False,
+        )
+    except Exception:
+        # Mail failures must never break the save that triggered them.
+        metrics.mail_failures.inc(kind=kind)
+    else:
+        metrics.mail_sent.inc(kind=kind)
+    finally:
+        metrics.mail_send_duration.observe(time.perf_counter() - start, kind=kind)
+
 
 @receiver(post_save, sender=CustomUser)
 def create_student_profile_and_welcome(sender, instance, created, **kwargs):
@@ -11,7 +39,8 @@ def create_student_profile_and_welcome(sender, instance, created, **kwargs):
         profile, _ = StudentProfile.objects.get_or_create(
             user=instance,
             defaults={
-                "roll_number": f"S{instance.id:04d}", 
+                "tenant_id": instance.tenant_id,
+                "roll_number": generate_roll_number(instance.tenant_id),
             }
         )
 
@@ -23,13 +52,7 @@ def create_student_profile_and_welcome(sender, instance, created, **kwargs):
                 f"Your roll number is: {profile.roll_number}\n\n"
                 f"Regards,\nStudent Management"
             )
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [instance.email],
-                fail_silently=True,
-            )
+            send_signal_mail("welcome", subject, message, instance.email)
 
 @receiver(post_save, sender=Enrollment)
 def notify_enrollment(sender, instance, created, **kwargs):
@@ -44,10 +67,73 @@ def notify_enrollment(sender, instance, created, **kwargs):
                 f" - {instance.course.title}\n\n"
                 "Regards,\nStudent Management"
             )
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [student_user.email],
-                fail_silently=True,
-            )
+            send_signal_mail("enrollment", subject, message, student_user.email)
+
+
+@receiver(post_save, sender=Enrollment)
+def count_new_enrollment(sender, instance, created, **kwargs):
+    if created:
+        update_enrollment_counters(instance, enrolled=1, completed=int(instance.completed))
+
+
+@receiver(post_delete, sender=Enrollment)
+def count_deleted_enrollment(sender, instance, **kwargs):
+    # Soft-deleted enrollments were already subtracted when they were hidden.
+    if instance.deleted_at is None:
+        update_enrollment_counters(instance, enrolled=-1, completed=-int(instance.completed))
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_user_capabilities(sender, instance, created, **kwargs):
+    if not created:
+        permissions.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=StudentProfile)
+def invalidate_profile_capabilities(sender, instance, created, **kwargs):
+    if created:
+        permissions.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Enrollment)
+def announce_enrollment(sender, instance, created, **kwargs):
+    if created:
+        live.publish(
+            'enrollment',
+            tenant=instance.tenant_id,
+            student=instance.student.user.username,
+            course=instance.course.title,
+            enrolled_at=instance.enrolled_at,
+            deltas={'enrollment_count': 1},
+        )
+
+
+@receiver(post_delete, sender=Enrollment)
+def announce_deleted_enrollment(sender, instance, **kwargs):
+    if instance.deleted_at is None:
+        live.publish('counts', tenant=instance.tenant_id, deltas={'enrollment_count': -1})
+
+
+@receiver(post_save, sender=StudentProfile)
+def announce_student(sender, instance, created, **kwargs):
+    if created:
+        live.publish('counts', tenant=instance.tenant_id, deltas={'student_count': 1})
+
+
+@receiver(post_save, sender=Course)
+def announce_course(sender, instance, created, **kwargs):
+    if created:
+        live.publish('counts', tenant=instance.tenant_id, deltas={'course_count': 1})
+
+
+@receiver(post_save, sender=Tenant)
+def tenant_changed(sender, instance, created, **kwargs):
+    if instance.domain:
+        cache.delete(tenancy.host_cache_key(instance.domain))
+    if created:
+        # New rows must not land in the default partition, or creating the
+        # tenant's own partition later fails.
+        connection = connections[router.db_for_write(Enrollment)]
+        table = Enrollment._meta.db_table
+        if tenancy.enrollment_is_partitioned(connection, table):
+            tenancy.create_enrollment_partition(connection, table, instance.pk)
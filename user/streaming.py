@@ -0,0 +1,26 @@
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+
+# A streaming response only streams when its iterator matches the server:
+# under ASGI (the Procfile) Django reads a sync iterator to the end with
+# sync_to_async(list) before sending anything, and under WSGI (runserver,
+# the test client) it does the same with an async one.
+
+def for_server(request, response, batch):
+    # Sync views build sync iterators; under ASGI they are handed over
+    # `batch` items at a time, each batch read in the request's sync thread,
+    # where the view's database connection lives.
+    if isinstance(request, ASGIRequest):
+        response.streaming_content = _batches(response.streaming_content, batch)
+    return response
+
+
+async def _batches(iterable, batch):
+    iterator = iter(iterable)
+    take = sync_to_async(lambda: list(islice(iterator, batch)))
+    while items := await take():
+        for item in items:
+            yield item
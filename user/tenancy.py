@@ -0,0 +1,98 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+
+
+# Id of the institution the current request (or job) runs for. None means
+# unscoped: management commands and maintenance see every tenant.
+_current = ContextVar("current_tenant", default=None)
+
+HOST_CACHE_TIMEOUT = 60 * 5
+
+_default_tenant_id = None
+
+
+def current_tenant_id():
+    return _current.get()
+
+
+@contextmanager
+def use(tenant_id):
+    token = _current.set(tenant_id)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def default_tenant_id():
+    # Created by migration 0011; the id never changes, so it is looked up once
+    # per process. Used for rows saved outside a request.
+    global _default_tenant_id
+    if _default_tenant_id is None:
+        from .models import Tenant
+
+        _default_tenant_id = (
+            Tenant.objects.filter(slug=settings.DEFAULT_TENANT_SLUG).values_list("pk", flat=True).first()
+        )
+    return _default_tenant_id
+
+
+def active_tenant_id():
+    return current_tenant_id() or default_tenant_id()
+
+
+def host_cache_key(host):
+    return f"tenant:host:{host}"
+
+
+def resolve_host(host):
+    host = host.split(":")[0].lower()
+    key = host_cache_key(host)
+    tenant_id = cache.get(key)
+    metrics.cache_lookup("tenant_host", tenant_id is not None)
+    if tenant_id is None:
+        from .models import Tenant
+
+        tenant_id = (
+            Tenant.objects.filter(domain=host).values_list("pk", flat=True).first()
+            or default_tenant_id()
+        )
+        cache.set(key, tenant_id, HOST_CACHE_TIMEOUT)
+    return tenant_id
+
+
+class TenantScopedMixin:
+    # Manager mixin: inside a tenant every query is filtered on tenant_id,
+    # which leads each of the tenant models' composite indexes.
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        tenant_id = current_tenant_id()
+        if tenant_id is None:
+            return queryset
+        return queryset.filter(tenant_id=tenant_id)
+
+
+# Optional PostgreSQL LIST partitioning of Enrollment by tenant; see the
+# enrollment_partitions command.
+
+def enrollment_is_partitioned(connection, table):
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table]
+        )
+        return cursor.fetchone() is not None
+
+
+def create_enrollment_partition(connection, table, tenant_id):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {table}_t{int(tenant_id)} "
+            f"PARTITION OF {table} FOR VALUES IN ({int(tenant_id)})"
+        )
@@ -0,0 +1,25 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from . import factories
+
+
+class ViewTestCase(TestCase):
+    # Capabilities, catalog pages and throttles live in the cache, and ids are
+    # reused once a test's transaction rolls back, so every test starts empty.
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = factories.create_admin()
+        cls.student = factories.create_student()
+        cls.student_user = cls.student.user
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def login_admin(self):
+        self.client.force_login(self.admin)
+
+    def login_student(self, profile=None):
+        self.client.force_login((profile or self.student).user)
@@ -0,0 +1,120 @@
+from collections import Counter
+from itertools import count
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from user import tenancy
+from user.models import CustomUser, StudentProfile, Course, Enrollment, Tenant
+
+
+PASSWORD = "pass12345"
+
+# Unique within a test process; parallel workers each have their own database.
+_sequence = count(1)
+
+
+def _hashed_password():
+    # Hashed once per call; every user in a batch shares it.
+    return make_password(PASSWORD)
+
+
+def create_tenant(**fields):
+    i = next(_sequence)
+    return Tenant.objects.create(**{
+        "name": f"Tenant {i}",
+        "slug": f"tenant-{i}",
+        "domain": f"tenant-{i}.example.com",
+        **fields,
+    })
+
+
+def create_users(n=1, role="student", **fields):
+    # bulk_create skips post_save, so no profile or welcome mail is created,
+    # and skips save(), so the tenant is filled in here.
+    password = _hashed_password()
+    fields.setdefault("tenant_id", tenancy.active_tenant_id())
+    users = []
+    for _ in range(n):
+        i = next(_sequence)
+        users.append(CustomUser(**{
+            "username": f"{role}{i}",
+            "email": f"{role}{i}@example.com",
+            "password": password,
+            "role": role,
+            **fields,
+        }))
+    return CustomUser.objects.bulk_create(users)
+
+
+def create_admin(**fields):
+    return create_users(1, role="admin", **fields)[0]
+
+
+def create_students(n=1, department="Physics", year_of_admission=2024, **fields):
+    users = create_users(n, role="student", **fields)
+    profiles = StudentProfile.objects.bulk_create([
+        StudentProfile(
+            user=user,
+            tenant_id=user.tenant_id,
+            roll_number=f"S{user.pk:04d}",
+            department=department,
+            year_of_admission=year_of_admission,
+        )
+        for user in users
+    ])
+    for profile, user in zip(profiles, users):
+        profile.user = user
+    return profiles
+
+
+def create_student(**fields):
+    return create_students(1, **fields)[0]
+
+
+def create_courses(n=1, **fields):
+    fields.setdefault("tenant_id", tenancy.active_tenant_id())
+    courses = []
+    for _ in range(n):
+        i = next(_sequence)
+        courses.append(Course(**{
+            "title": f"Course {i}",
+            "description": f"Description of course {i}.",
+            **fields,
+        }))
+    return Course.objects.bulk_create(courses)
+
+
+def create_course(**fields):
+    return create_courses(1, **fields)[0]
+
+
+def create_enrollments(pairs, completed=False, progress=0):
+    # pairs: iterable of (StudentProfile, Course). Counters are updated the
+    # way the enrollment signals would have done it.
+    pairs = list(pairs)
+    enrollments = Enrollment.objects.bulk_create([
+        Enrollment(
+            tenant_id=student.tenant_id,
+            student=student,
+            course=course,
+            completed=completed,
+            progress=100 if completed else progress,
+            completed_at=timezone.now() if completed else None,
+        )
+        for student, course in pairs
+    ])
+
+    for model, field in ((StudentProfile, "student_id"), (Course, "course_id")):
+        totals = Counter(getattr(e, field) for e in enrollments)
+        objs = list(model.all_objects.filter(pk__in=totals))
+        for obj in objs:
+            obj.enrollment_count += totals[obj.pk]
+            if completed:
+                obj.completed_count += totals[obj.pk]
+        model.all_objects.bulk_update(objs, ["enrollment_count", "completed_count"])
+    return enrollments
+
+
+def create_enrollment(student, course, **fields):
+    return create_enrollments([(student, course)], **fields)[0]
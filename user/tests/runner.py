@@ -0,0 +1,20 @@
+import time
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TimedTestRunner(DiscoverRunner):
+    # Reports the suite's wall-clock time against settings.TEST_TIME_BUDGET.
+
+    def run_tests(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = super().run_tests(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        budget = getattr(settings, "TEST_TIME_BUDGET", None)
+        if budget and elapsed > budget:
+            self.log(f"Test suite took {elapsed:.1f}s, over the {budget}s budget.")
+        elif self.verbosity >= 1:
+            self.log(f"Test suite took {elapsed:.1f}s.")
+        return result
@@ -0,0 +1,143 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from user import archive, reports
+from user.models import ArchivedEnrollment, ArchivedStudent, CustomUser, Enrollment, StudentProfile
+
+from . import factories
+from .base import ViewTestCase
+
+
+def run(command, *args):
+    call_command(command, *args, stdout=StringIO())
+
+
+class ArchiveTests(ViewTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.old, cls.recent, cls.current = factories.create_courses(3)
+        factories.create_enrollment(cls.student, cls.old, completed=True)
+        factories.create_enrollment(cls.student, cls.recent, completed=True)
+        factories.create_enrollment(cls.student, cls.current, progress=40)
+        Enrollment.objects.filter(course=cls.old).update(
+            completed_at=timezone.now() - timedelta(days=400)
+        )
+        cls.graduate = factories.create_student(year_of_admission=timezone.now().year - 5)
+        factories.create_enrollment(cls.graduate, cls.old, completed=True)
+
+    def test_old_completions_move_to_the_archive(self):
+        version = reports.current_snapshot(self.student)[1]
+        run("archive", "--skip-students")
+
+        self.assertEqual(
+            list(Enrollment.objects.filter(student=self.student).values_list("course_id", flat=True).order_by("pk")),
+            [self.recent.pk, self.current.pk],
+        )
+        archived = ArchivedEnrollment.objects.get(student_id=self.student.pk)
+        self.assertEqual((archived.course_title, archived.completed), (self.old.title, True))
+
+        # Archived completions still count.
+        self.student.refresh_from_db()
+        self.assertEqual((self.student.enrollment_count, self.student.completed_count), (3, 2))
+        self.old.refresh_from_db()
+        self.assertEqual(self.old.completion_rate, 100)
+        # The transcript reads both tiers, so it is unchanged.
+        self.assertEqual(reports.current_snapshot(self.student)[1], version)
+
+    def test_graduates_are_archived_with_their_enrollments(self):
+        run("archive", "--completed-days", "10000")
+
+        self.assertFalse(StudentProfile.all_objects.filter(pk=self.graduate.pk).exists())
+        self.assertTrue(ArchivedStudent.objects.filter(pk=self.graduate.pk).exists())
+        self.assertTrue(CustomUser.objects.get(pk=self.graduate.user_id).is_active)
+        self.assertEqual(ArchivedEnrollment.objects.filter(student_id=self.graduate.pk).count(), 1)
+        # The other student is not admitted long enough ago.
+        self.assertTrue(StudentProfile.objects.filter(pk=self.student.pk).exists())
+        self.old.refresh_from_db()
+        self.assertEqual((self.old.enrollment_count, self.old.completed_count), (2, 2))
+
+        self.login_admin()
+        response = self.client.get(reverse("transcript_download", args=[self.graduate.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.old.title.encode(), response.content)
+
+    def test_graduates_keep_their_transcript(self):
+        run("archive", "--completed-days", "10000")
+        self.login_student(self.graduate)
+
+        response = self.client.get(reverse("student_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.old.title)
+        self.assertNotContains(response, reverse("edit_my_profile"))
+
+        job = self.client.post(reverse("transcript_request")).json()
+        response = self.client.get(job["download_url"])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.old.title.encode(), response.content)
+        # No other student's transcript, and no new profile on the way.
+        self.assertEqual(self.client.get(reverse("transcript_download", args=[self.student.pk])).status_code, 403)
+        self.assertEqual(self.client.get(reverse("edit_my_profile")).status_code, 302)
+        self.assertFalse(StudentProfile.all_objects.filter(user_id=self.graduate.user_id).exists())
+
+    def test_restore_student(self):
+        run("archive", "--completed-days", "10000")
+        run("restore_archived", "--student", str(self.graduate.pk))
+
+        profile = StudentProfile.objects.get(pk=self.graduate.pk)
+        self.assertEqual(profile.roll_number, self.graduate.roll_number)
+        self.assertEqual((profile.enrollment_count, profile.completed_count), (1, 1))
+        self.assertTrue(CustomUser.objects.get(pk=self.graduate.user_id).is_active)
+        self.assertFalse(ArchivedStudent.objects.exists())
+        self.assertFalse(ArchivedEnrollment.objects.filter(student_id=self.graduate.pk).exists())
+        self.old.refresh_from_db()
+        self.assertEqual(self.old.enrollment_count, 2)
+
+    def test_reconcile_counts_both_tiers(self):
+        run("archive", "--completed-days", "10000")
+        out = StringIO()
+        call_command("reconcile_counters", "--dry-run", stdout=out)
+        self.assertIn("Found 0 students", out.getvalue())
+        self.assertIn("Found 0 courses", out.getvalue())
+
+    def test_soft_delete_uncounts_archived_enrollments(self):
+        run("archive", "--skip-students")
+        self.student.soft_delete()
+        self.old.refresh_from_db()
+        self.assertEqual((self.old.enrollment_count, self.old.completed_count), (1, 1))
+
+        self.old.soft_delete()
+        out = StringIO()
+        call_command("reconcile_counters", "--dry-run", stdout=out)
+        self.assertIn("Found 0 students", out.getvalue())
+        self.assertIn("Found 0 courses", out.getvalue())
+
+    def test_archived_course_counts_as_enrolled(self):
+        run("archive", "--skip-students")
+        self.login_student()
+        response = self.client.get(reverse("course_catalog"))
+        flags = {c["id"]: c["enrolled"] for c in response.context["courses"]}
+        self.assertTrue(flags[self.old.pk])
+
+        self.client.post(reverse("course_self_enroll", args=[self.old.pk]), {"idempotency_key": "again"})
+        self.assertFalse(Enrollment.objects.filter(student=self.student, course=self.old).exists())
+        self.old.refresh_from_db()
+        self.assertEqual((self.old.enrollment_count, self.old.completed_count), (2, 2))
+
+    def test_restore_skips_re_enrolled_course(self):
+        archive.archive_enrollments(Enrollment.objects.filter(course=self.old).values_list("pk", flat=True))
+        factories.create_enrollment(self.student, self.old)
+
+        restored, skipped = archive.restore_enrollments(ArchivedEnrollment.objects.all())
+        self.assertEqual((restored, skipped), (1, 1))
+        self.assertTrue(ArchivedEnrollment.objects.filter(student_id=self.student.pk).exists())
+
+    def test_dry_run_changes_nothing(self):
+        out = StringIO()
+        call_command("archive", "--dry-run", stdout=out)
+        self.assertIn("Would archive 1 students", out.getvalue())
+        self.assertFalse(ArchivedEnrollment.objects.exists())
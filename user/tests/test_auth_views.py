@@ -0,0 +1,94 @@
+from django.core import mail
+from django.urls import reverse
+
+from user.models import CustomUser, StudentProfile
+
+from . import factories
+from .base import ViewTestCase
+
+
+class HomeViewTests(ViewTestCase):
+    def test_anonymous(self):
+        response = self.client.get(reverse("home"))
+        self.assertEqual(response.status_code, 200)
+
+
+class RegisterViewTests(ViewTestCase):
+    def form(self, **overrides):
+        data = {
+            "username": "newstudent",
+            "email": "new@example.com",
+            "password1": "Unusual-pass-981",
+            "password2": "Unusual-pass-981",
+            "idempotency_key": "register-1",
+        }
+        data.update(overrides)
+        return data
+
+    def test_get(self):
+        self.assertEqual(self.client.get(reverse("register")).status_code, 200)
+
+    def test_creates_student_with_profile(self):
+        response = self.client.post(reverse("register"), self.form())
+        self.assertRedirects(response, reverse("login"))
+
+        user = CustomUser.objects.get(username="newstudent")
+        self.assertEqual(user.role, "student")
+        self.assertTrue(StudentProfile.objects.filter(user=user).exists())
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_resubmit_is_replayed(self):
+        self.client.post(reverse("register"), self.form())
+        response = self.client.post(reverse("register"), self.form())
+        self.assertRedirects(response, reverse("login"))
+        self.assertEqual(CustomUser.objects.filter(username="newstudent").count(), 1)
+
+    def test_invalid_form(self):
+        response = self.client.post(reverse("register"), self.form(password2="mismatch"))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(CustomUser.objects.filter(username="newstudent").exists())
+
+
+class LoginViewTests(ViewTestCase):
+    def test_get(self):
+        self.assertEqual(self.client.get(reverse("login")).status_code, 200)
+
+    def test_admin_goes_to_admin_dashboard(self):
+        response = self.client.post(reverse("login"), {
+            "username": self.admin.username, "password": factories.PASSWORD,
+        })
+        self.assertRedirects(response, reverse("admin_dashboard"))
+
+    def test_student_goes_to_student_dashboard(self):
+        response = self.client.post(reverse("login"), {
+            "username": self.student_user.username, "password": factories.PASSWORD,
+        })
+        self.assertRedirects(response, reverse("student_dashboard"))
+
+    def test_wrong_password(self):
+        response = self.client.post(reverse("login"), {
+            "username": self.admin.username, "password": "wrong",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("_auth_user_id", self.client.session)
+
+
+class LogoutViewTests(ViewTestCase):
+    def test_logs_out(self):
+        self.login_student()
+        response = self.client.get(reverse("logout"))
+        self.assertRedirects(response, reverse("login"))
+        self.assertNotIn("_auth_user_id", self.client.session)
+
+
+class PasswordResetViewTests(ViewTestCase):
+    def test_sends_reset_mail(self):
+        self.assertEqual(self.client.get(reverse("password_reset")).status_code, 200)
+        response = self.client.post(reverse("password_reset"), {"email": self.student_user.email})
+        self.assertRedirects(response, reverse("password_reset_done"))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("/reset/", mail.outbox[0].body)
+
+    def test_done_and_complete_pages(self):
+        self.assertEqual(self.client.get(reverse("password_reset_done")).status_code, 200)
+        self.assertEqual(self.client.get(reverse("password_reset_complete")).status_code, 200)
@@ -0,0 +1,155 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from user.models import Course, Enrollment
+from user.views import SELF_ENROLL_LIMIT
+
+from . import factories
+from .base import ViewTestCase
+
+
+class CourseAdminViewTests(ViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_admin()
+
+    def test_list_and_search(self):
+        factories.create_courses(3)
+        factories.create_course(title="Organic Chemistry")
+        self.assertEqual(len(self.client.get(reverse("course_list")).context["courses"]), 4)
+        response = self.client.get(reverse("course_list"), {"q": "organic"})
+        self.assertEqual(len(response.context["courses"]), 1)
+
+    def test_create(self):
+        self.assertEqual(self.client.get(reverse("course_create")).status_code, 200)
+        response = self.client.post(reverse("course_create"), {
+            "title": "Algebra", "description": "Groups and rings.",
+        })
+        self.assertRedirects(response, reverse("course_list"))
+        self.assertTrue(Course.objects.filter(title="Algebra").exists())
+
+    def test_title_is_reusable_after_delete(self):
+        course = factories.create_course(title="Algebra")
+        self.client.post(reverse("course_delete", args=[course.pk]))
+        self.client.post(reverse("course_create"), {"title": "Algebra", "description": ""})
+        self.assertEqual(Course.all_objects.filter(title="Algebra").count(), 2)
+
+    def test_edit(self):
+        course = factories.create_course()
+        url = reverse("course_edit", args=[course.pk])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.post(url, {"title": "Renamed", "description": "New."})
+        self.assertRedirects(response, reverse("course_list"))
+        course.refresh_from_db()
+        self.assertEqual(course.title, "Renamed")
+
+    def test_delete_is_soft(self):
+        course = factories.create_course()
+        factories.create_enrollment(self.student, course)
+        url = reverse("course_delete", args=[course.pk])
+
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertRedirects(self.client.post(url), reverse("course_list"))
+
+        self.assertFalse(Course.objects.filter(pk=course.pk).exists())
+        self.assertFalse(Enrollment.objects.filter(course=course).exists())
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.enrollment_count, 0)
+
+
+class CourseCatalogTests(ViewTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.courses = factories.create_courses(3)
+        factories.create_enrollment(cls.student, cls.courses[0])
+
+    def setUp(self):
+        super().setUp()
+        self.login_student()
+
+    def test_flags_enrolled_courses(self):
+        response = self.client.get(reverse("course_catalog"))
+        flags = {c["id"]: c["enrolled"] for c in response.context["courses"]}
+        self.assertEqual(flags, {
+            self.courses[0].pk: True, self.courses[1].pk: False, self.courses[2].pk: False,
+        })
+
+    def test_page_is_shared_and_cached(self):
+        self.client.get(reverse("course_catalog"))
+        other = factories.create_student()
+        self.login_student(other)
+        # Session, user, catalog version and the enrolled-ids lookup; the
+        # profile id comes from the capability query on first use.
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("course_catalog"))
+        self.assertFalse(any(c["enrolled"] for c in response.context["courses"]))
+
+    def test_page_spellings_share_one_entry(self):
+        self.client.get(reverse("course_catalog"), {"page": "1"})
+        for page in ("01", " 1 ", "x", ""):
+            # Session, user, catalog version and enrolled ids; no page query.
+            with self.subTest(page=page), self.assertNumQueries(4):
+                self.client.get(reverse("course_catalog"), {"page": page})
+
+    def test_deleted_course_drops_out(self):
+        self.client.get(reverse("course_catalog"))
+        self.courses[1].soft_delete()
+        response = self.client.get(reverse("course_catalog"))
+        self.assertNotIn(self.courses[1].pk, [c["id"] for c in response.context["courses"]])
+
+    def test_purged_course_stays_out(self):
+        # The purged course was the newest deletion; without it, the newest
+        # updated_at is the one the first page was cached under.
+        self.client.get(reverse("course_catalog"))
+        self.courses[1].soft_delete()
+        self.client.get(reverse("course_catalog"))
+        call_command("purge_deleted", stdout=StringIO())
+        response = self.client.get(reverse("course_catalog"))
+        self.assertNotIn(self.courses[1].pk, [c["id"] for c in response.context["courses"]])
+
+    def test_search(self):
+        response = self.client.get(reverse("course_catalog"), {"q": self.courses[2].title})
+        self.assertEqual([c["id"] for c in response.context["courses"]], [self.courses[2].pk])
+
+
+class CourseSelfEnrollTests(ViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = factories.create_course()
+        self.login_student()
+
+    def enroll(self, course=None, key=None):
+        course = course or self.course
+        return self.client.post(
+            reverse("course_self_enroll", args=[course.pk]),
+            {"idempotency_key": key or f"enroll-{course.pk}"},
+        )
+
+    def test_enrolls_once(self):
+        self.assertRedirects(self.enroll(), reverse("course_catalog"))
+        self.assertRedirects(self.enroll(key="second"), reverse("course_catalog"))
+        self.assertEqual(Enrollment.objects.filter(student=self.student, course=self.course).count(), 1)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 1)
+
+    def test_get_not_allowed(self):
+        response = self.client.get(reverse("course_self_enroll", args=[self.course.pk]))
+        self.assertEqual(response.status_code, 405)
+
+    def test_deleted_course(self):
+        self.course.soft_delete()
+        self.assertEqual(self.enroll().status_code, 404)
+
+    def test_throttled(self):
+        courses = factories.create_courses(SELF_ENROLL_LIMIT + 1)
+        for course in courses:
+            self.enroll(course)
+        self.assertEqual(Enrollment.objects.filter(student=self.student).count(), SELF_ENROLL_LIMIT)
+
+    def test_admin_cannot_self_enroll(self):
+        self.login_admin()
+        self.assertEqual(self.enroll().status_code, 302)
+        self.assertFalse(Enrollment.objects.exists())
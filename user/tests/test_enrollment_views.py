@@ -0,0 +1,71 @@
+from django.urls import reverse
+
+from user.models import Enrollment
+
+from . import factories
+from .base import ViewTestCase
+
+
+class EnrollmentAdminViewTests(ViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = factories.create_course()
+        self.login_admin()
+
+    def test_list_and_search(self):
+        other = factories.create_course(title="Astronomy")
+        factories.create_enrollments([(self.student, self.course), (self.student, other)])
+        self.assertEqual(len(self.client.get(reverse("enrollment_list")).context["enrollments"]), 2)
+        response = self.client.get(reverse("enrollment_list"), {"q": "astro"})
+        self.assertEqual(len(response.context["enrollments"]), 1)
+
+    def test_create(self):
+        self.assertEqual(self.client.get(reverse("enrollment_create")).status_code, 200)
+        data = {"student": self.student.pk, "course": self.course.pk, "idempotency_key": "assign-1"}
+        self.assertRedirects(self.client.post(reverse("enrollment_create"), data), reverse("enrollment_list"))
+        # A resubmitted form is replayed, not inserted again.
+        self.assertRedirects(self.client.post(reverse("enrollment_create"), data), reverse("enrollment_list"))
+
+        self.assertEqual(Enrollment.objects.filter(student=self.student).count(), 1)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 1)
+
+    def test_create_duplicate(self):
+        factories.create_enrollment(self.student, self.course)
+        data = {"student": self.student.pk, "course": self.course.pk}
+        self.client.post(reverse("enrollment_create"), data)
+        self.assertEqual(Enrollment.objects.filter(student=self.student).count(), 1)
+
+    def test_delete(self):
+        enrollment = factories.create_enrollment(self.student, self.course)
+        url = reverse("enrollment_delete", args=[enrollment.pk])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertRedirects(self.client.post(url), reverse("enrollment_list"))
+        self.assertFalse(Enrollment.all_objects.filter(pk=enrollment.pk).exists())
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 0)
+
+
+class MarkCourseCompleteTests(ViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = factories.create_course()
+        self.enrollment = factories.create_enrollment(self.student, self.course)
+        self.login_student()
+
+    def test_completes_once(self):
+        url = reverse("mark_course_complete", args=[self.enrollment.pk])
+        self.assertRedirects(self.client.get(url), reverse("student_dashboard"))
+        self.assertRedirects(self.client.get(url), reverse("student_dashboard"))
+
+        self.enrollment.refresh_from_db()
+        self.assertTrue(self.enrollment.completed)
+        self.assertEqual(self.enrollment.progress, 100)
+        self.assertIsNotNone(self.enrollment.completed_at)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.completed_count, 1)
+
+    def test_other_students_enrollment(self):
+        self.login_student(factories.create_student())
+        response = self.client.get(reverse("mark_course_complete", args=[self.enrollment.pk]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,61 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from user import queries
+
+from . import factories
+from .base import ViewTestCase
+
+
+LONG = " ".join(f"word{i}" for i in range(400))
+
+
+class ProjectionTests(ViewTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = factories.create_course(title="Optics", description=LONG)
+        cls.enrollment = factories.create_enrollment(cls.student, cls.course)
+
+    def fetched_sql(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        # Leaves out the session and request.user lookups of the middleware.
+        sql = [q["sql"] for q in ctx.captured_queries if 'FROM "user_customuser" WHERE' not in q["sql"]]
+        return response, " ".join(sql)
+
+    def test_preview_is_cut_in_sql(self):
+        row = queries.catalog_rows().get(pk=self.course.pk)
+        self.assertEqual(row["description_preview"], LONG[:queries.PREVIEW_CHARS])
+
+    def test_list_pages_skip_password_and_full_description(self):
+        self.login_admin()
+        for name in ("student_list", "enrollment_list", "course_list"):
+            with self.subTest(name):
+                _, sql = self.fetched_sql(reverse(name))
+                self.assertNotIn('"password"', sql)
+                self.assertNotRegex(sql, r'(?<!SUBSTR\()"user_course"\."description"')
+
+    def test_pages_show_the_projected_values(self):
+        self.login_admin()
+        response, _ = self.fetched_sql(reverse("enrollment_list"))
+        self.assertContains(response, self.student_user.username)
+        self.assertContains(response, "Optics")
+        response, _ = self.fetched_sql(reverse("course_list"))
+        self.assertContains(response, "word14 …")
+
+        self.login_student()
+        response, _ = self.fetched_sql(reverse("student_dashboard"))
+        self.assertContains(response, "word19 …")
+        self.assertNotContains(response, "word20")
+
+    def test_delete_page_loads_everything_in_one_query(self):
+        self.login_admin()
+        url = reverse("enrollment_delete", args=[self.enrollment.pk])
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        enrollment_queries = [q for q in ctx.captured_queries if 'FROM "user_enrollment"' in q["sql"]]
+        self.assertEqual(len(enrollment_queries), 1)
+        self.assertNotIn('"password"', enrollment_queries[0]["sql"])
@@ -0,0 +1,244 @@
+import json
+import os
+import shutil
+import tempfile
+import warnings
+from unittest import mock
+
+from django.test import AsyncClient, override_settings
+from django.utils import timezone
+from django.urls import reverse
+
+from user import archive, audit, live, metrics, reports
+from user.models import AuditLog, Enrollment, LiveEvent, ReportJob
+
+from . import factories
+from .base import ViewTestCase
+
+
+class TranscriptViewTests(ViewTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = factories.create_course()
+        factories.create_enrollment(cls.student, cls.course, completed=True)
+
+    def request_transcript(self, **data):
+        return self.client.post(reverse("transcript_request"), data)
+
+    def test_student_request_render_and_download(self):
+        self.login_student()
+        response = self.request_transcript()
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+        self.assertEqual(job["status"], ReportJob.PENDING)
+
+        # A second click reuses the queued job.
+        self.assertEqual(self.request_transcript().json()["id"], job["id"])
+
+        reports.work(once=True, log=lambda message: None)
+
+        status = self.client.get(job["status_url"]).json()
+        self.assertEqual(status["status"], ReportJob.DONE)
+        download = self.client.get(status["download_url"])
+        self.assertEqual(download.status_code, 200)
+        self.assertIn(self.course.title.encode(), b"".join(download.streaming_content))
+
+        # An unchanged transcript is served from the existing snapshot.
+        self.assertEqual(self.request_transcript().json()["status"], ReportJob.DONE)
+
+    def test_unexpected_errors_fail_the_job(self):
+        job = ReportJob.objects.create(department="Physics")
+        with mock.patch.object(reports, "job_student_ids", side_effect=RuntimeError("boom")):
+            reports.work(once=True, log=lambda message: None)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportJob.FAILED)
+        self.assertIn("boom", job.error)
+
+    def test_stale_running_jobs_are_requeued(self):
+        stale = ReportJob.objects.create(
+            student=self.student, status=ReportJob.RUNNING,
+            started_at=timezone.now() - reports.STALE_AFTER * 2,
+        )
+        fresh = ReportJob.objects.create(department="Physics", status=ReportJob.RUNNING, started_at=timezone.now())
+        self.assertEqual(reports.claim_next_job().pk, stale.pk)
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.status, ReportJob.RUNNING)
+
+    def test_admin_department_job(self):
+        self.login_admin()
+        response = self.request_transcript(department="Physics")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(ReportJob.objects.get(pk=response.json()["id"]).department, "Physics")
+
+    def test_admin_cannot_request_without_target(self):
+        self.login_admin()
+        self.assertEqual(self.request_transcript().status_code, 403)
+
+    def test_admin_student_must_be_an_id(self):
+        self.login_admin()
+        self.assertEqual(self.request_transcript(student="abc").status_code, 400)
+        self.assertEqual(self.request_transcript(student=str(self.student.pk)).status_code, 202)
+
+    def test_other_students_cannot_see_job_or_download(self):
+        self.login_student()
+        job_id = self.request_transcript().json()["id"]
+
+        self.login_student(factories.create_student())
+        self.assertEqual(self.client.get(reverse("report_job_status", args=[job_id])).status_code, 403)
+        self.assertEqual(
+            self.client.get(reverse("transcript_download", args=[self.student.pk])).status_code, 403
+        )
+
+    def test_download_before_render(self):
+        self.login_student()
+        response = self.client.get(reverse("transcript_download", args=[self.student.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class CohortAnalyticsTests(ViewTestCase):
+    def test_report(self):
+        courses = factories.create_courses(2)
+        factories.create_enrollment(self.student, courses[0], completed=True)
+        factories.create_enrollment(self.student, courses[1])
+        self.login_admin()
+
+        report = self.client.get(reverse("cohort_analytics")).json()
+        self.assertEqual(report["enrollments"], 2)
+        self.assertEqual(report["departments"], ["Physics"])
+        self.assertEqual(sum(row["completed"] for row in report["completion"]), 1)
+
+    def test_archived_completions_still_count(self):
+        course = factories.create_course()
+        enrollment = factories.create_enrollment(self.student, course, completed=True)
+        self.login_admin()
+        before = self.client.get(reverse("cohort_analytics")).json()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            archive.archive_enrollments([enrollment.pk])
+        after = self.client.get(reverse("cohort_analytics")).json()
+        self.assertEqual(after["completion"], before["completion"])
+        self.assertEqual(after["departments"], ["Physics"])
+
+    def test_bulk_changes_refresh_the_cached_report(self):
+        course = factories.create_course()
+        factories.create_enrollment(self.student, course, completed=True)
+        self.login_admin()
+        self.assertEqual(self.client.get(reverse("cohort_analytics")).json()["completion"][0]["completed"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.update(completed=False)
+            audit.bulk_changed()
+        self.assertEqual(self.client.get(reverse("cohort_analytics")).json()["completion"][0]["completed"], 0)
+
+
+class AuditLogExportTests(ViewTestCase):
+    def test_exports_committed_changes(self):
+        course = factories.create_course()
+        self.login_admin()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("course_edit", args=[course.pk]), {
+                "title": "Renamed", "description": course.description,
+            })
+        self.assertTrue(AuditLog.objects.exists())
+
+        response = self.client.get(reverse("audit_log_export"), {"model": "course"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["object_id"], course.pk)
+        self.assertEqual(rows[0]["actor_id"], self.admin.pk)
+        self.assertEqual(rows[0]["changes"]["title"][1], "Renamed")
+
+    def test_invalid_and_naive_dates(self):
+        self.login_admin()
+        url = reverse("audit_log_export")
+        self.assertEqual(self.client.get(url, {"since": "2024-13-01T00:00"}).status_code, 400)
+        response = self.client.get(url, {"since": "2024-01-01T00:00", "until": "2024-02-01T00:00"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"")
+
+    async def test_streams_under_asgi(self):
+        await AuditLog.objects.abulk_create([
+            AuditLog(
+                created_at=timezone.now(), tenant_id=self.admin.tenant_id,
+                model="course", object_id=i, action="u", changes={},
+            )
+            for i in range(3)
+        ])
+        client = AsyncClient()
+        await client.aforce_login(self.admin)
+        response = await client.get(reverse("audit_log_export"))
+        # A sync iterator would be read to the end first, with a warning.
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            lines = [line async for line in response.streaming_content]
+        self.assertEqual(len(lines), 3)
+
+
+class MetricsViewTests(ViewTestCase):
+    def test_exposition(self):
+        self.client.get(reverse("home"))
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer test-metrics-token")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"http_requests_total", response.content)
+
+    def test_cache_lookups_are_counted(self):
+        before = metrics.cache_lookups.dump()
+        self.login_student()
+        self.client.get(reverse("course_catalog"))
+        self.client.get(reverse("course_catalog"))
+        after = metrics.cache_lookups.dump()
+
+        def delta(key):
+            return after.get(key, 0) - before.get(key, 0)
+
+        self.assertEqual((delta("catalog\x1fmiss"), delta("catalog\x1fhit")), (1, 1))
+        self.assertGreaterEqual(delta("capabilities\x1fhit"), 1)
+
+    def test_needs_the_token(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 404)
+
+    def test_exited_workers_are_folded_into_one_file(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with override_settings(METRICS_MULTIPROC_DIR=directory):
+            for pid in (101, 102):
+                with open(os.path.join(directory, f"metrics_{pid}.json"), "w") as fh:
+                    json.dump({"mail_sent_total": {"welcome": 2}}, fh)
+                metrics.REGISTRY.retire(pid)
+        self.assertEqual(os.listdir(directory), ["metrics_exited.json"])
+        with open(os.path.join(directory, "metrics_exited.json")) as fh:
+            self.assertEqual(json.load(fh), {"mail_sent_total": {"welcome": 4}})
+
+
+class AdminLiveFeedTests(ViewTestCase):
+    async def test_stream_opens(self):
+        client = AsyncClient()
+        await client.aforce_login(self.admin)
+        response = await client.get(reverse("admin_live_feed"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b"retry: 5000\n\n")
+        await stream.aclose()
+
+    async def test_students_are_redirected(self):
+        client = AsyncClient()
+        await client.aforce_login(self.student_user)
+        response = await client.get(reverse("admin_live_feed"))
+        self.assertEqual(response.status_code, 302)
+
+
+class DatabaseBrokerTests(ViewTestCase):
+    def test_publishers_trim_old_events_without_a_poller(self):
+        broker = live.DatabaseBroker()
+        broker.trim_every = 3
+        broker.publish({"type": "counts"})
+        broker.publish({"type": "counts"})
+        LiveEvent.objects.update(created_at=timezone.now() - broker.retention * 2)
+
+        broker.publish({"type": "counts"})
+        self.assertEqual(LiveEvent.objects.count(), 1)
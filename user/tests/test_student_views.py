@@ -0,0 +1,165 @@
+from django.urls import reverse
+
+from user.models import CustomUser, StudentProfile, Enrollment
+
+from . import factories
+from .base import ViewTestCase
+
+
+class AccessTests(ViewTestCase):
+    admin_urls = [
+        ("admin_dashboard", []),
+        ("student_list", []),
+        ("student_create", []),
+        ("course_list", []),
+        ("course_create", []),
+        ("enrollment_list", []),
+        ("enrollment_create", []),
+        ("cohort_analytics", []),
+        ("audit_log_export", []),
+    ]
+
+    def test_anonymous_redirected_to_login(self):
+        for name, args in self.admin_urls + [("student_dashboard", []), ("course_catalog", [])]:
+            with self.subTest(name):
+                response = self.client.get(reverse(name, args=args))
+                self.assertEqual(response.status_code, 302)
+                self.assertTrue(response["Location"].startswith(reverse("login")))
+
+    def test_students_cannot_open_admin_pages(self):
+        self.login_student()
+        for name, args in self.admin_urls:
+            with self.subTest(name):
+                response = self.client.get(reverse(name, args=args))
+                self.assertEqual(response.status_code, 302)
+                self.assertTrue(response["Location"].startswith(reverse("login")))
+
+    def test_admins_cannot_open_student_pages(self):
+        self.login_admin()
+        for name in ("student_dashboard", "edit_my_profile", "course_catalog"):
+            with self.subTest(name):
+                self.assertEqual(self.client.get(reverse(name)).status_code, 302)
+
+
+class AdminDashboardTests(ViewTestCase):
+    def test_counts(self):
+        courses = factories.create_courses(2)
+        factories.create_enrollments((self.student, c) for c in courses)
+        self.login_admin()
+
+        response = self.client.get(reverse("admin_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["student_count"], 1)
+        self.assertEqual(response.context["course_count"], 2)
+        self.assertEqual(response.context["enrollment_count"], 2)
+
+
+class StudentAdminViewTests(ViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_admin()
+
+    def test_list_and_search(self):
+        factories.create_students(3, department="Chemistry")
+        response = self.client.get(reverse("student_list"))
+        self.assertEqual(len(response.context["students"]), 4)
+
+        response = self.client.get(reverse("student_list"), {"q": "Chemistry"})
+        self.assertEqual(len(response.context["students"]), 3)
+
+    def test_create(self):
+        self.assertEqual(self.client.get(reverse("student_create")).status_code, 200)
+        response = self.client.post(reverse("student_create"), {
+            "username": "added",
+            "email": "added@example.com",
+            "first_name": "Ada",
+            "last_name": "Lovelace",
+            "department": "Maths",
+            "year_of_admission": 2023,
+            "idempotency_key": "create-1",
+        })
+        self.assertRedirects(response, reverse("student_list"))
+        profile = StudentProfile.objects.get(user__username="added")
+        self.assertEqual(profile.department, "Maths")
+
+    def test_create_duplicate_username(self):
+        response = self.client.post(reverse("student_create"), {
+            "username": self.student_user.username,
+            "email": "dup@example.com",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(CustomUser.objects.filter(username=self.student_user.username).count(), 1)
+
+    def test_edit(self):
+        url = reverse("student_edit", args=[self.student.pk])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.post(url, {
+            "username": self.student_user.username,
+            "email": self.student_user.email,
+            "first_name": "Renamed",
+            "last_name": "",
+            "department": "Biology",
+            "year_of_admission": 2022,
+        })
+        self.assertRedirects(response, reverse("student_list"))
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.department, "Biology")
+        self.assertEqual(self.student.user.first_name, "Renamed")
+
+    def test_detail(self):
+        response = self.client.get(reverse("student_detail", args=[self.student.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_delete_is_soft(self):
+        course = factories.create_course()
+        factories.create_enrollment(self.student, course)
+        url = reverse("student_delete", args=[self.student.pk])
+
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertRedirects(self.client.post(url), reverse("student_list"))
+
+        self.assertFalse(StudentProfile.objects.filter(pk=self.student.pk).exists())
+        self.assertTrue(StudentProfile.all_objects.filter(pk=self.student.pk).exists())
+        self.assertFalse(Enrollment.objects.filter(student_id=self.student.pk).exists())
+        course.refresh_from_db()
+        self.assertEqual(course.enrollment_count, 0)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class StudentSelfServiceTests(ViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_student()
+
+    def test_dashboard_lists_enrollments(self):
+        course = factories.create_course()
+        factories.create_enrollment(self.student, course)
+        response = self.client.get(reverse("student_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, course.title)
+
+    def test_dashboard_creates_missing_profile(self):
+        user = factories.create_users(1)[0]
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse("student_dashboard")).status_code, 200)
+        self.assertTrue(StudentProfile.objects.filter(user=user).exists())
+
+    def test_edit_my_profile(self):
+        url = reverse("edit_my_profile")
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.post(url, {
+            "first_name": "Grace",
+            "last_name": "Hopper",
+            "email": "grace@example.com",
+            "department": "Computing",
+            "year_of_admission": 2021,
+        })
+        self.assertRedirects(response, reverse("student_dashboard"))
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.department, "Computing")
+
+    def test_edit_my_profile_invalid(self):
+        response = self.client.post(reverse("edit_my_profile"), {
+            "email": "not-an-email", "year_of_admission": "x",
+        })
+        self.assertEqual(response.status_code, 200)
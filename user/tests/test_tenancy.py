@@ -0,0 +1,120 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from user import reports, tenancy
+from user.models import Course, CustomUser, Enrollment, ReportJob, StudentProfile, generate_roll_number
+
+from . import factories
+from .base import ViewTestCase
+
+
+@override_settings(ALLOWED_HOSTS=["testserver", ".example.com"])
+class TenantIsolationTests(ViewTestCase):
+    # The base class's users belong to the default tenant (host testserver);
+    # the other tenant is reached on its own domain.
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tenant = factories.create_tenant()
+        with tenancy.use(cls.tenant.pk):
+            cls.other_admin = factories.create_admin()
+            cls.other_student = factories.create_student()
+            cls.other_course = factories.create_course(title="Shared Title")
+            factories.create_enrollment(cls.other_student, cls.other_course)
+        cls.course = factories.create_course(title="Shared Title")
+
+    def get(self, name, *args, host="testserver", **params):
+        return self.client.get(reverse(name, args=args), params, HTTP_HOST=host)
+
+    def test_lists_are_scoped_to_the_host(self):
+        self.login_admin()
+        students = self.get("student_list").context["students"]
+        self.assertEqual([s.pk for s in students], [self.student.pk])
+
+        self.client.force_login(self.other_admin)
+        response = self.get("course_list", host=self.tenant.domain)
+        self.assertEqual([c.pk for c in response.context["courses"]], [self.other_course.pk])
+
+    def test_other_tenants_rows_are_not_found(self):
+        self.login_admin()
+        self.assertEqual(self.get("student_edit", self.other_student.pk).status_code, 404)
+        self.assertEqual(self.get("course_edit", self.other_course.pk).status_code, 404)
+
+    def test_transcripts_of_other_tenants_are_not_served(self):
+        with tenancy.use(self.tenant.pk):
+            reports.render_transcript(self.other_student.pk)
+        self.login_admin()
+        self.assertEqual(self.get("transcript_download", self.other_student.pk).status_code, 404)
+
+        self.client.force_login(self.other_admin)
+        response = self.get("transcript_download", self.other_student.pk, host=self.tenant.domain)
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_report_jobs_of_other_tenants_are_not_found(self):
+        with tenancy.use(self.tenant.pk):
+            job = ReportJob.objects.create(student=self.other_student)
+        self.login_admin()
+        self.assertEqual(self.get("report_job_status", job.pk).status_code, 404)
+
+        self.client.force_login(self.other_admin)
+        self.assertEqual(self.get("report_job_status", job.pk, host=self.tenant.domain).status_code, 200)
+
+    def test_usernames_taken_in_another_tenant_are_rejected(self):
+        taken = self.other_student.user.username
+        response = self.client.post(reverse("register"), {
+            "username": taken, "email": "new@example.com",
+            "password1": "S3cure-pass-word", "password2": "S3cure-pass-word",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("username", response.context["form"].errors)
+
+        self.login_admin()
+        response = self.client.post(reverse("student_create"), {"username": taken, "email": "new@example.com"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("username", response.context["user_form"].errors)
+        self.assertEqual(CustomUser._base_manager.filter(username=taken).count(), 1)
+
+    def test_session_does_not_carry_over_to_another_tenant(self):
+        self.login_admin()
+        response = self.get("admin_dashboard", host=self.tenant.domain)
+        self.assertEqual(response.status_code, 302)
+
+    def test_course_titles_are_unique_per_tenant(self):
+        self.assertEqual(Course.objects.filter(title="Shared Title").count(), 2)
+        self.login_admin()
+        response = self.client.post(reverse("course_create"), {"title": "Shared Title", "description": ""})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["form"].errors)
+
+    def test_catalog_is_cached_per_tenant(self):
+        self.login_student()
+        ids = [c["id"] for c in self.get("course_catalog").context["courses"]]
+        self.assertEqual(ids, [self.course.pk])
+
+        self.client.force_login(self.other_student.user)
+        response = self.get("course_catalog", host=self.tenant.domain)
+        self.assertEqual([(c["id"], c["enrolled"]) for c in response.context["courses"]], [
+            (self.other_course.pk, True),
+        ])
+
+    def test_rows_take_the_current_tenant(self):
+        with tenancy.use(self.tenant.pk):
+            user = CustomUser.objects.create_user("newcomer", role="student")
+            enrollment = Enrollment.objects.create(student=user.studentprofile, course=self.other_course)
+        self.assertEqual(user.tenant_id, self.tenant.pk)
+        self.assertEqual(user.studentprofile.tenant_id, self.tenant.pk)
+        self.assertEqual(enrollment.tenant_id, self.tenant.pk)
+        with tenancy.use(self.tenant.pk):
+            self.assertFalse(StudentProfile.objects.filter(pk=self.student.pk).exists())
+
+
+class RollNumberTests(ViewTestCase):
+    def test_each_tenant_has_its_own_sequence(self):
+        first, second = factories.create_tenant(), factories.create_tenant()
+        self.assertEqual(generate_roll_number(first.pk), "S0001")
+        self.assertEqual(generate_roll_number(first.pk), "S0002")
+        self.assertEqual(generate_roll_number(second.pk), "S0001")
+        with tenancy.use(second.pk):
+            self.assertEqual(generate_roll_number(), "S0002")
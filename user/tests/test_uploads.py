@@ -0,0 +1,80 @@
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+
+from user.models import AuditLog, StudentProfile
+
+from .base import ViewTestCase
+
+
+def image_file(size=(800, 600), fmt="PNG", name="photo.png"):
+    out = BytesIO()
+    Image.new("RGB", size, "navy").save(out, fmt)
+    return SimpleUploadedFile(name, out.getvalue(), content_type=f"image/{fmt.lower()}")
+
+
+@override_settings(PROFILE_PICTURE_SIZE=128)
+class ProfilePictureUploadTests(ViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_student()
+
+    def upload(self, picture):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse("edit_my_profile"), {
+                "first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com",
+                "department": "Physics", "year_of_admission": 2024, "profile_picture": picture,
+            })
+
+    def test_picture_is_resized_off_the_form(self):
+        response = self.upload(image_file())
+        self.assertRedirects(response, reverse("student_dashboard"))
+
+        profile = StudentProfile.objects.get(pk=self.student.pk)
+        self.assertFalse(profile.pending_picture)
+        self.assertEqual(profile.picture_status, "")
+        with Image.open(profile.profile_picture.open("rb")) as image:
+            self.assertEqual((image.format, image.size), ("JPEG", (128, 96)))
+
+    def test_swap_is_audited(self):
+        self.upload(image_file())
+        profile = StudentProfile.objects.get(pk=self.student.pk)
+        entry = AuditLog.objects.filter(
+            model="studentprofile", object_id=profile.pk, changes__has_key="profile_picture",
+        ).get()
+        self.assertEqual(entry.changes["profile_picture"], [None, profile.profile_picture.name])
+
+    @override_settings(UPLOAD_MAX_BYTES=1024)
+    def test_too_many_bytes(self):
+        response = self.upload(image_file(fmt="BMP", name="photo.bmp"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("larger than", response.context["profile_form"].errors["profile_picture"][0])
+        self.assertFalse(StudentProfile.objects.get(pk=self.student.pk).pending_picture)
+
+    @override_settings(UPLOAD_MAX_PIXELS=100_000)
+    def test_too_many_pixels_is_caught_from_the_header(self):
+        response = self.upload(image_file(size=(1000, 1000)))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("megapixels", response.context["profile_form"].errors["profile_picture"][0])
+
+    def test_unreadable_file_is_rejected_by_the_worker(self):
+        self.upload(SimpleUploadedFile("photo.jpg", b"not an image", content_type="image/jpeg"))
+        profile = StudentProfile.objects.get(pk=self.student.pk)
+        self.assertEqual(profile.picture_status, StudentProfile.PICTURE_FAILED)
+        self.assertFalse(profile.pending_picture)
+        self.assertFalse(profile.profile_picture)
+
+    def test_admin_edit_and_clear(self):
+        self.login_admin()
+        url = reverse("student_edit", args=[self.student.pk])
+        data = {"username": self.student_user.username, "email": "", "first_name": "", "last_name": "",
+                "department": "Physics", "year_of_admission": 2024}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {**data, "profile_picture": image_file()})
+        self.assertTrue(StudentProfile.objects.get(pk=self.student.pk).profile_picture)
+
+        self.client.post(url, {**data, "profile_picture-clear": "on"})
+        self.assertFalse(StudentProfile.objects.get(pk=self.student.pk).profile_picture)
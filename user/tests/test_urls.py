@@ -0,0 +1,13 @@
+from django.test import SimpleTestCase
+
+from user.lazy import lazy_views
+
+
+class LazyViewTests(SimpleTestCase):
+    def test_every_lazy_view_resolves(self):
+        views = list(lazy_views())
+        self.assertGreater(len(views), 30)
+        for view in views:
+            with self.subTest(view.lazy_path):
+                # Raises ImproperlyConfigured if is_async does not match.
+                self.assertTrue(callable(view.resolve()))
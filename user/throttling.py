@@ -0,0 +1,14 @@
+from django.core.cache import cache
+
+
+def allow(key, limit, window):
+    # Fixed-window counter: at most `limit` hits per `window` seconds.
+    cache_key = f"throttle:{key}"
+    if cache.add(cache_key, 1, window):
+        return True
+    try:
+        return cache.incr(cache_key) <= limit
+    except ValueError:
+        # The window expired between add() and incr().
+        cache.add(cache_key, 1, window)
+        return True
@@ -0,0 +1,187 @@
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from . import audit
+
+
+logger = logging.getLogger(__name__)
+
+# Profile pictures are validated, decoded and resized here, never inside the
+# request. The request only streams the upload through
+# LimitedUploadHandler, stores it as StudentProfile.pending_picture and
+# calls submit(); process_picture() then swaps the resized JPEG into
+# profile_picture once it is ready.
+
+_pool = None
+
+
+class RejectedUpload(UploadedFile):
+    # Stands in for a file the handler refused; forms turn it into an error.
+    # It has no content, but keeps the size that arrived so FileField does
+    # not report it as empty.
+    def __init__(self, name, reason, size):
+        super().__init__(BytesIO(), name=name, content_type="application/octet-stream", size=size)
+        self.rejection = reason
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    # First in FILE_UPLOAD_HANDLERS. Counts bytes as they stream in and reads
+    # image dimensions from the header, so oversized files stop being
+    # buffered at the first chunk over a limit and nothing is decoded.
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.head = b""
+        self.rejection = None
+        if self.content_length and self.content_length > settings.UPLOAD_MAX_BYTES:
+            self.rejection = _too_large()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.rejection is None:
+            self.received += len(raw_data)
+            if self.received > settings.UPLOAD_MAX_BYTES:
+                self.rejection = _too_large()
+            elif self.head is not None:
+                self._check_header(raw_data)
+        # Returning None keeps the rest of a rejected file out of memory and
+        # off disk.
+        return None if self.rejection else raw_data
+
+    def _check_header(self, raw_data):
+        self.head += raw_data
+        try:
+            with Image.open(BytesIO(self.head)) as image:
+                width, height = image.size
+        except Exception:
+            # Header not complete yet, or not an image: the worker decides.
+            if len(self.head) >= settings.UPLOAD_HEADER_BYTES:
+                self.head = None
+            return
+        self.head = None
+        if width * height > settings.UPLOAD_MAX_PIXELS:
+            self.rejection = (
+                f"Image is {width}×{height}; the limit is "
+                f"{settings.UPLOAD_MAX_PIXELS / 1_000_000:.0f} megapixels."
+            )
+
+    def file_complete(self, file_size):
+        if self.rejection:
+            return RejectedUpload(self.file_name, self.rejection, max(self.received, self.content_length or 0))
+        return None
+
+
+def _too_large():
+    return f"File is larger than {settings.UPLOAD_MAX_BYTES // (1024 * 1024)} MB."
+
+
+def render_picture(file):
+    # Decodes at most once, at reduced scale for JPEG (draft), and returns a
+    # square-bounded RGB JPEG.
+    size = settings.PROFILE_PICTURE_SIZE
+    with Image.open(file) as image:
+        if image.width * image.height > settings.UPLOAD_MAX_PIXELS:
+            raise ValueError(f"Image is {image.width}×{image.height}, too many pixels.")
+        image.draft("RGB", (size, size))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image.mode in ("RGBA", "LA", "P"):
+            rgba = image.convert("RGBA")
+            image = Image.new("RGB", rgba.size, "white")
+            image.paste(rgba, mask=rgba.getchannel("A"))
+        else:
+            image = image.convert("RGB")
+        out = BytesIO()
+        image.save(out, "JPEG", quality=85, optimize=True)
+    return out.getvalue()
+
+
+def process_picture(profile_id):
+    from .models import StudentProfile
+
+    profile = (
+        StudentProfile.all_objects.filter(pk=profile_id)
+        .only("pk", "tenant_id", "profile_picture", "pending_picture")
+        .first()
+    )
+    if profile is None or not profile.pending_picture:
+        return False
+    pending = profile.pending_picture.name
+    storage = profile.pending_picture.storage
+    # Only this upload is replaced; a newer one may have arrived meanwhile.
+    same_upload = StudentProfile.all_objects.filter(pk=profile_id, pending_picture=pending)
+
+    try:
+        with profile.pending_picture.open("rb") as file:
+            content = render_picture(file)
+    except Exception as exc:
+        logger.info("Rejected profile picture %s: %s", pending, exc)
+        reason = str(exc) if isinstance(exc, ValueError) else "The file is not a readable image."
+        same_upload.update(
+            pending_picture=None, picture_status=StudentProfile.PICTURE_FAILED, picture_error=reason[:200],
+        )
+        storage.delete(pending)
+        return False
+
+    field = StudentProfile._meta.get_field("profile_picture")
+    name = field.storage.save(
+        field.generate_filename(profile, f"{profile_id}-{uuid.uuid4().hex[:8]}.jpg"),
+        ContentFile(content),
+    )
+    swapped = same_upload.update(
+        profile_picture=name, pending_picture=None, picture_status="", picture_error="",
+    )
+    storage.delete(pending)
+    if not swapped:
+        field.storage.delete(name)
+        return False
+    # The queryset update skips AuditMixin; the swap is recorded like any
+    # other profile change.
+    audit.record(profile, audit.UPDATE, {
+        'profile_picture': [audit.audit_value(profile.profile_picture), name],
+    })
+    if profile.profile_picture and profile.profile_picture.name != name:
+        field.storage.delete(profile.profile_picture.name)
+    return True
+
+
+def _run(profile_id):
+    try:
+        process_picture(profile_id)
+    except Exception:
+        logger.exception("Processing the picture of profile %s failed", profile_id)
+    finally:
+        # As at the end of a request: the thread's connection is dropped
+        # unless CONN_MAX_AGE keeps it.
+        close_old_connections()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # Created on first use, so preloaded gunicorn workers each get their
+        # own threads after the fork.
+        _pool = ThreadPoolExecutor(max_workers=settings.UPLOAD_WORKERS, thread_name_prefix="uploads")
+    return _pool
+
+
+def submit(profile_id):
+    # After commit, so the worker sees the pending file. UPLOAD_WORKERS = 0
+    # processes inline (tests); process_uploads picks up anything a
+    # restart dropped.
+    def start():
+        if settings.UPLOAD_WORKERS:
+            _get_pool().submit(_run, profile_id)
+        else:
+            process_picture(profile_id)
+
+    transaction.on_commit(start)
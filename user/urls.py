@@ -1,39 +1,51 @@
 from django.urls import path
-from .views import (
-    home, register, login_view, logout_view,
-    admin_dashboard, student_dashboard,
-    student_list, student_create, student_edit, student_delete, student_detail,
-    edit_my_profile,
-    course_list, course_create, course_edit, course_delete,
-    enrollment_list, enrollment_create, enrollment_delete, mark_course_complete
-)
+from .lazy import lazy_view
+
+
+def view(name, **kwargs):
+    # Views load on first dispatch; see lazy_view.
+    return lazy_view(f"user.views.{name}", **kwargs)
+
 
 urlpatterns = [
-    path("", home, name="home"),
+    path("", view("home"), name="home"),
+
+    path("register/", view("register"), name="register"),
+    path("login/", view("login_view"), name="login"),
+    path("logout/", view("logout_view"), name="logout"),
+
+    path("admin-dashboard/", view("admin_dashboard"), name="admin_dashboard"),
+    path("admin-dashboard/live/", view("admin_live_feed", is_async=True), name="admin_live_feed"),
+
+    path("student-dashboard/", view("student_dashboard"), name="student_dashboard"),
+    path("edit-my-profile/", view("edit_my_profile"), name="edit_my_profile"),
+
+    path("students/", view("student_list"), name="student_list"),
+    path("students/add/", view("student_create"), name="student_create"),
+    path("students/<int:pk>/edit/", view("student_edit"), name="student_edit"),
+    path("students/<int:pk>/delete/", view("student_delete"), name="student_delete"),
+    path("students/<int:pk>/", view("student_detail"), name="student_detail"),
 
-    path("register/", register, name="register"),
-    path("login/", login_view, name="login"),
-    path("logout/", logout_view, name="logout"),
+    path("courses/", view("course_list"), name="course_list"),
+    path("courses/create/", view("course_create"), name="course_create"),
+    path("courses/<int:pk>/edit/", view("course_edit"), name="course_edit"),
+    path("courses/<int:pk>/delete/", view("course_delete"), name="course_delete"),
+    path("courses/catalog/", view("course_catalog"), name="course_catalog"),
+    path("courses/<int:pk>/enroll/", view("course_self_enroll"), name="course_self_enroll"),
 
-    path("admin-dashboard/", admin_dashboard, name="admin_dashboard"),
+    path("enrollments/", view("enrollment_list"), name="enrollment_list"),
+    path("enrollments/create/", view("enrollment_create"), name="enrollment_create"),
+    path("enrollments/<int:pk>/delete/", view("enrollment_delete"), name="enrollment_delete"),
 
-    path("student-dashboard/", student_dashboard, name="student_dashboard"),
-    path("edit-my-profile/", edit_my_profile, name="edit_my_profile"),
+    path("enrollment/<int:pk>/complete/", view("mark_course_complete"), name="mark_course_complete"),
 
-    path("students/", student_list, name="student_list"),
-    path("students/add/", student_create, name="student_create"),
-    path("students/<int:pk>/edit/", student_edit, name="student_edit"),
-    path("students/<int:pk>/delete/", student_delete, name="student_delete"),
-    path("students/<int:pk>/", student_detail, name="student_detail"),
+    path("transcripts/request/", view("transcript_request"), name="transcript_request"),
+    path("transcripts/jobs/<int:pk>/", view("report_job_status"), name="report_job_status"),
+    path("transcripts/<int:pk>/download/", view("transcript_download"), name="transcript_download"),
 
-    path("courses/", course_list, name="course_list"),
-    path("courses/create/", course_create, name="course_create"),
-    path("courses/<int:pk>/edit/", course_edit, name="course_edit"),
-    path("courses/<int:pk>/delete/", course_delete, name="course_delete"),
+    path("analytics/cohorts/", view("cohort_analytics"), name="cohort_analytics"),
 
-    path("enrollments/", enrollment_list, name="enrollment_list"),
-    path("enrollments/create/", enrollment_create, name="enrollment_create"),
-    path("enrollments/<int:pk>/delete/", enrollment_delete, name="enrollment_delete"),
+    path("audit/export/", view("audit_log_export"), name="audit_log_export"),
 
-    path("enrollment/<int:pk>/complete/", mark_course_complete, name="mark_course_complete"),
+    path("metrics", view("metrics"), name="metrics"),
 ]
@@ -1,12 +1,34 @@
+import asyncio
+import json
+from datetime import timedelta
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse,
+    StreamingHttpResponse,
+)
+from django.urls import reverse
+from django.views.decorators.http import require_POST
 from django.contrib.auth import login, logout
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
 from django.db.models import Q, Count
-
-from .decorators import admin_required, student_required
-from .models import StudentProfile, CustomUser, Course, Enrollment
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.dateparse import parse_datetime
+
+from .decorators import admin_required, capabilities_required, capability_required, student_required
+from .idempotency import idempotent
+from .permissions import get_capabilities
+from .models import (
+    StudentProfile, CustomUser, Course, Enrollment, AuditLog, ReportJob, TranscriptSnapshot,
+    ArchivedEnrollment, ArchivedStudent, update_enrollment_counters,
+)
 from .forms import (
     CustomUserRegisterForm,
     StudentProfileAdminForm,
@@ -19,26 +41,45 @@ from .forms import (
 )
 
 from .utils import generate_roll_number
+from . import audit, catalog, live, queries, reports, streaming, throttling
+from . import metrics as app_metrics
+
+
+SELF_ENROLL_LIMIT = 10
+SELF_ENROLL_WINDOW = 60
 
 
 def home(request):
     return render(request, 'home.html')
 
 
+@idempotent
 def register(request):
     if request.method == "POST":
         form = CustomUserRegisterForm(request.POST)
         if form.is_valid():
-            user = form.save()
-
-            profile, created = StudentProfile.objects.get_or_create(user=user)
+            # A concurrent duplicate resolves to the existing row instead of
+            # failing on the unique username.
+            user, created = CustomUser.objects.get_or_create(
+                username=form.cleaned_data["username"],
+                defaults={
+                    "email": form.cleaned_data["email"],
+                    "role": "student",
+                    "password": make_password(form.cleaned_data["password1"]),
+                },
+            )
 
             if created:
-                profile.roll_number = generate_roll_number()
-                profile.save()
+                profile, created = StudentProfile.objects.get_or_create(user=user)
+
+                if created:
+                    profile.roll_number = generate_roll_number()
+                    profile.save()
 
-            messages.success(request, "Account created successfully. Please log in.")
-            return redirect("login")
+                messages.success(request, "Account created successfully. Please log in.")
+                return redirect("login")
+
+            form.add_error("username", "A user with that username already exists.")
     else:
         form = CustomUserRegisterForm()
 
@@ -48,11 +89,11 @@ def register(request):
 @login_required
 @admin_required
 def admin_dashboard(request):
-    student_count = CustomUser.objects.filter(role="student").count()
+    student_count = CustomUser.objects.filter(role="student", is_active=True).count()
     course_count = Course.objects.count()
     enrollment_count = Enrollment.objects.count()
 
-    recent_students = StudentProfile.objects.select_related('user').order_by('-id')[:6]
+    recent_students = queries.recent_students()
 
     students_by_dept_qs = (
         StudentProfile.objects
@@ -65,13 +106,13 @@ def admin_dashboard(request):
     departments = [row['department'] for row in students_by_dept_qs]
     students_by_dept = [row['count'] for row in students_by_dept_qs]
 
-    enrollments_by_course_qs = (
-        Enrollment.objects.values('course__title')
-        .annotate(count=Count('id'))
-        .order_by('-count')[:10]
+    top_courses = (
+        Course.objects.filter(enrollment_count__gt=0)
+        .order_by('-enrollment_count')
+        .values('title', 'enrollment_count')[:10]
     )
-    course_titles = [row['course__title'] for row in enrollments_by_course_qs]
-    enrollments_counts = [row['count'] for row in enrollments_by_course_qs]
+    course_titles = [row['title'] for row in top_courses]
+    enrollments_counts = [row['enrollment_count'] for row in top_courses]
 
     return render(request, 'dashboards/admin_dashboard.html', {
         'student_count': student_count,
@@ -91,7 +132,7 @@ def admin_dashboard(request):
 def student_list(request):
     search = request.GET.get("q", "")
 
-    students = StudentProfile.objects.select_related("user").filter(user__role="student")
+    students = queries.student_rows()
 
     if search:
         students = students.filter(
@@ -113,27 +154,37 @@ def student_list(request):
 
 @login_required
 @admin_required
+@idempotent
 def student_create(request):
     if request.method == "POST":
         user_form = AdminCreateStudentUserForm(request.POST)
         profile_form = StudentProfileAdminForm(request.POST, request.FILES)
 
         if user_form.is_valid() and profile_form.is_valid():
-            user = user_form.save(commit=False)
-            user.role = "student"
-            user.set_password("student123")
-            user.save()
-
-            profile, created = StudentProfile.objects.get_or_create(user=user)
+            user, created = CustomUser.objects.get_or_create(
+                username=user_form.cleaned_data["username"],
+                defaults={
+                    "email": user_form.cleaned_data["email"],
+                    "first_name": user_form.cleaned_data["first_name"],
+                    "last_name": user_form.cleaned_data["last_name"],
+                    "role": "student",
+                    "password": make_password("student123"),
+                },
+            )
 
             if created:
-                profile.roll_number = generate_roll_number()
+                profile, created = StudentProfile.objects.get_or_create(user=user)
 
-            profile_form = StudentProfileAdminForm(request.POST, request.FILES, instance=profile)
-            profile_form.save()
+                if created:
+                    profile.roll_number = generate_roll_number()
 
-            messages.success(request, "Student added successfully.")
-            return redirect("student_list")
+                profile_form = StudentProfileAdminForm(request.POST, request.FILES, instance=profile)
+                profile_form.save()
+
+                messages.success(request, "Student added successfully.")
+                return redirect("student_list")
+
+            user_form.add_error("username", "A user with that username already exists.")
 
     else:
         user_form = AdminCreateStudentUserForm()
@@ -176,11 +227,10 @@ def student_edit(request, pk):
 @login_required
 @admin_required
 def student_delete(request, pk):
-    profile = get_object_or_404(StudentProfile, pk=pk)
-    user = profile.user
+    profile = get_object_or_404(queries.student_card(), pk=pk)
 
     if request.method == "POST":
-        user.delete()
+        profile.soft_delete()
         messages.success(request, "Student deleted.")
         return redirect("student_list")
 
@@ -190,15 +240,24 @@ def student_delete(request, pk):
 @login_required
 @admin_required
 def student_detail(request, pk):
-    profile = get_object_or_404(StudentProfile, pk=pk)
+    profile = get_object_or_404(queries.student_card(), pk=pk)
     return render(request, "students/student_detail.html", {"profile": profile})
 
 
 @login_required
-@student_required
+@capabilities_required(lambda caps: caps.is_student or caps.graduated)
 def student_dashboard(request):
+    caps = get_capabilities(request)
+    if caps.graduated:
+        # Read-only: the archived profile, its courses and the transcript.
+        return render(request, 'dashboards/student_dashboard.html', {
+            'profile': get_object_or_404(ArchivedStudent, pk=caps.profile_id),
+            'enrollments': queries.archived_dashboard_enrollments(caps.profile_id),
+            'graduated': True,
+        })
+
     profile, _ = StudentProfile.objects.get_or_create(user=request.user)
-    enrollments = Enrollment.objects.filter(student=profile).select_related('course')
+    enrollments = queries.dashboard_enrollments(profile.pk)
 
     return render(request, 'dashboards/student_dashboard.html', {
         'profile': profile,
@@ -238,7 +297,7 @@ def edit_my_profile(request):
 @admin_required
 def course_list(request):
     q = request.GET.get('q', '')
-    qs = Course.objects.all()
+    qs = queries.course_rows()
 
     if q:
         qs = qs.filter(title__icontains=q)
@@ -250,6 +309,49 @@ def course_list(request):
     return render(request, 'courses/course_list.html', {'courses': courses, 'q': q})
 
 
+@login_required
+@student_required
+def course_catalog(request):
+    q = request.GET.get('q', '')
+    page = catalog.catalog_page(q, request.GET.get('page'))
+    enrolled = catalog.enrolled_course_ids(
+        get_capabilities(request).profile_id, [c['id'] for c in page['courses']]
+    )
+
+    return render(request, 'courses/course_catalog.html', {
+        'courses': [{**c, 'enrolled': c['id'] in enrolled} for c in page['courses']],
+        'page': page,
+        'q': q,
+    })
+
+
+@require_POST
+@login_required
+@student_required
+@idempotent
+def course_self_enroll(request, pk):
+    caps = get_capabilities(request)
+    if not throttling.allow(f"enroll:{caps.user_id}", SELF_ENROLL_LIMIT, SELF_ENROLL_WINDOW):
+        messages.error(request, "Too many enrollment requests. Please wait a minute and try again.")
+        return redirect("course_catalog")
+
+    course = get_object_or_404(queries.course_title(), pk=pk)
+    profile_id = caps.profile_id
+    if profile_id is None:
+        profile_id = StudentProfile.objects.get_or_create(user=request.user)[0].pk
+
+    # A completed enrollment that was archived still counts as enrolled.
+    if ArchivedEnrollment.objects.filter(student_id=profile_id, course_id=course.pk).exists():
+        messages.info(request, f"You already completed {course.title}.")
+        return redirect("course_catalog")
+    _, created = Enrollment.objects.get_or_create(student_id=profile_id, course=course)
+    if created:
+        messages.success(request, f"You enrolled in {course.title}.")
+    else:
+        messages.info(request, f"You are already enrolled in {course.title}.")
+    return redirect("course_catalog")
+
+
 @login_required
 @admin_required
 def course_create(request):
@@ -285,10 +387,10 @@ def course_edit(request, pk):
 @login_required
 @admin_required
 def course_delete(request, pk):
-    course = get_object_or_404(Course, pk=pk)
+    course = get_object_or_404(queries.course_title(), pk=pk)
 
-    if request.method == "POST__":
-        course.delete()
+    if request.method == "POST":
+        course.soft_delete()
         messages.success(request, "Course deleted successfully.")
         return redirect('course_list')
 
@@ -299,7 +401,7 @@ def course_delete(request, pk):
 @admin_required
 def enrollment_list(request):
     q = request.GET.get('q', '')
-    qs = Enrollment.objects.select_related('student__user', 'course').order_by('-id')
+    qs = queries.enrollment_rows()
 
     if q:
         qs = qs.filter(
@@ -319,14 +421,18 @@ def enrollment_list(request):
 
 @login_required
 @admin_required
+@idempotent
 def enrollment_create(request):
     if request.method == "POST":
         form = EnrollmentForm(request.POST)
         if form.is_valid():
-            try:
-                form.save()
+            _, created = Enrollment.objects.get_or_create(
+                student=form.cleaned_data["student"],
+                course=form.cleaned_data["course"],
+            )
+            if created:
                 messages.success(request, "Course assigned successfully.")
-            except:
+            else:
                 messages.error(request, "This student is already enrolled in this course.")
             return redirect("enrollment_list")
     else:
@@ -341,7 +447,7 @@ def enrollment_create(request):
 @login_required
 @admin_required
 def enrollment_delete(request, pk):
-    enrollment = get_object_or_404(Enrollment, pk=pk)
+    enrollment = get_object_or_404(queries.enrollment_card(), pk=pk)
 
     if request.method == "POST":
         enrollment.delete()
@@ -352,13 +458,25 @@ def enrollment_delete(request, pk):
 
 
 @login_required
-@student_required
+@capability_required("complete_own_enrollment")
 def mark_course_complete(request, pk):
-    enrollment = get_object_or_404(Enrollment, pk=pk, student__user=request.user)
-
-    enrollment.completed = True
-    enrollment.progress = 100
-    enrollment.save()
+    enrollment = get_object_or_404(queries.enrollment_card(), pk=pk)
+    if not get_capabilities(request).owns(enrollment):
+        raise Http404("No such enrollment.")
+
+    # Only the request that flips completed counts it, even on double clicks.
+    with transaction.atomic():
+        completed_at = timezone.now()
+        flipped = Enrollment.objects.filter(pk=enrollment.pk, completed=False).update(
+            completed=True, progress=100, completed_at=completed_at
+        )
+        if flipped:
+            update_enrollment_counters(enrollment, completed=1)
+            audit.record(enrollment, audit.UPDATE, {
+                'completed': [False, True],
+                'progress': [enrollment.progress, 100],
+                'completed_at': [None, completed_at],
+            })
 
     messages.success(request, f"You completed {enrollment.course.title}!")
     return redirect("student_dashboard")
@@ -371,7 +489,7 @@ def login_view(request):
             user = form.get_user()
             login(request, user)
 
-            if user.is_superuser or user.role == "admin":
+            if get_capabilities(request).is_admin:
                 return redirect("admin_dashboard")
             return redirect("student_dashboard")
     else:
@@ -383,3 +501,183 @@ def login_view(request):
 def logout_view(request):
     logout(request)
     return redirect("login")
+
+
+def _aware(value):
+    # Naive datetimes are read in the current time zone.
+    if value is not None and timezone.is_naive(value):
+        return timezone.make_aware(value)
+    return value
+
+
+@login_required
+@capability_required("export_audit_log")
+def audit_log_export(request):
+    try:
+        until = _aware(parse_datetime(request.GET.get("until", ""))) or timezone.now()
+        since = _aware(parse_datetime(request.GET.get("since", ""))) or until - timedelta(days=1)
+    except ValueError:
+        # Well formed but impossible, e.g. month 13.
+        return HttpResponseBadRequest("since and until must be valid ISO 8601 datetimes.")
+
+    qs = AuditLog.objects.filter(created_at__gte=since, created_at__lt=until)
+    if request.tenant_id is not None:
+        qs = qs.filter(tenant_id=request.tenant_id)
+    if request.GET.get("model"):
+        qs = qs.filter(model=request.GET["model"])
+    if request.GET.get("object_id", "").isdigit():
+        qs = qs.filter(object_id=request.GET["object_id"])
+
+    rows = qs.order_by("created_at").values(
+        "created_at", "actor_id", "model", "object_id", "action", "changes"
+    )
+
+    def stream():
+        for row in rows.iterator(chunk_size=2000):
+            yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+    response = StreamingHttpResponse(stream(), content_type="application/x-ndjson")
+    return streaming.for_server(request, response, batch=2000)
+
+
+def _job_status(job):
+    data = {
+        "id": job.pk,
+        "status": job.status,
+        "done": job.done,
+        "total": job.total,
+        "status_url": reverse("report_job_status", args=[job.pk]),
+    }
+    if job.status == ReportJob.DONE and job.student_id:
+        data["download_url"] = reverse("transcript_download", args=[job.student_id])
+    return data
+
+
+@login_required
+@require_POST
+def transcript_request(request):
+    caps = get_capabilities(request)
+
+    if caps.can("view_all_transcripts") and request.POST.get("department"):
+        job = ReportJob.objects.create(
+            department=request.POST["department"], requested_by=request.user
+        )
+        return JsonResponse(_job_status(job), status=202)
+
+    if caps.can("view_all_transcripts") and request.POST.get("student"):
+        if not request.POST["student"].isdigit():
+            return HttpResponseBadRequest("student must be a profile id.")
+        profile_id = int(request.POST["student"])
+    elif caps.graduated:
+        # Archived transcripts are rendered on download.
+        return JsonResponse({
+            "status": ReportJob.DONE,
+            "download_url": reverse("transcript_download", args=[caps.profile_id]),
+        })
+    elif caps.is_student and caps.profile_id:
+        profile_id = caps.profile_id
+    else:
+        return HttpResponseForbidden()
+
+    profile = get_object_or_404(StudentProfile.objects.select_related("user"), pk=profile_id)
+    snapshot, _, _ = reports.current_snapshot(profile)
+    if snapshot is not None:
+        return JsonResponse({
+            "status": ReportJob.DONE,
+            "download_url": reverse("transcript_download", args=[profile.pk]),
+        })
+
+    job = (
+        ReportJob.objects.filter(student=profile, status__in=[ReportJob.PENDING, ReportJob.RUNNING]).first()
+        or ReportJob.objects.create(student=profile, requested_by=request.user)
+    )
+    return JsonResponse(_job_status(job), status=202)
+
+
+@login_required
+def report_job_status(request, pk):
+    job = get_object_or_404(ReportJob, pk=pk)
+    caps = get_capabilities(request)
+    if not (caps.can("view_all_transcripts") or caps.owns(job)):
+        return HttpResponseForbidden()
+    return JsonResponse(_job_status(job))
+
+
+@login_required
+def transcript_download(request, pk):
+    caps = get_capabilities(request)
+    if not (caps.can("view_all_transcripts") or caps.owns_profile(pk)):
+        return HttpResponseForbidden()
+
+    # Snapshots carry no tenant of their own; going through the profile
+    # keeps another tenant's transcripts out of reach.
+    snapshot = (
+        TranscriptSnapshot.objects.filter(student__in=StudentProfile.all_objects.filter(pk=pk))
+        .order_by("-generated_at").first()
+    )
+    if snapshot is None:
+        html = reports.archived_transcript(pk)
+        if html is None:
+            raise Http404("No transcript has been generated yet.")
+        response = HttpResponse(html, content_type="text/html")
+        response["Content-Disposition"] = f'attachment; filename="transcript-{pk}.html"'
+        return response
+    response = FileResponse(
+        snapshot.file.open("rb"),
+        as_attachment=True,
+        filename=f"transcript-{pk}.html",
+        content_type="text/html",
+    )
+    # 16 blocks of FileResponse.block_size (4 KB) per read.
+    return streaming.for_server(request, response, batch=16)
+
+
+@login_required
+@admin_required
+async def admin_live_feed(request):
+    # Server-Sent Events: one long-lived connection per admin dashboard.
+    # Needs the ASGI entry point; WSGI would buffer the stream.
+    broker = live.get_broker()
+    tenant_id = request.tenant_id
+
+    async def stream():
+        queue = broker.subscribe()
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if tenant_id is not None and event.get('tenant') not in (None, tenant_id):
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+        finally:
+            broker.unsubscribe(queue)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@login_required
+@admin_required
+def cohort_analytics(request):
+    # Imported here so NumPy is only loaded by workers that serve analytics.
+    from . import analytics
+
+    return JsonResponse(analytics.cohort_report())
+
+
+def metrics(request):
+    # Prometheus scrapes with "Authorization: Bearer <METRICS_TOKEN>"; without
+    # a configured token the endpoint does not exist on the public host.
+    token = settings.METRICS_TOKEN
+    if not token or not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        raise Http404
+    return HttpResponse(
+        app_metrics.REGISTRY.exposition(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )